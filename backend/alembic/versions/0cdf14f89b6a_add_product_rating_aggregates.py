@@ -0,0 +1,50 @@
+"""add product rating aggregates"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0cdf14f89b6a"
+down_revision = "e39d967356e2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "products",
+        sa.Column("rating_sum", sa.Float(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "products",
+        sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("products", sa.Column("avg_rating", sa.Float(), nullable=True))
+    # Backfill from the existing reviews
+    op.execute(
+        """
+        UPDATE products
+        SET rating_sum = totals.rating_sum,
+            rating_count = totals.rating_count,
+            avg_rating = totals.rating_sum / totals.rating_count
+        FROM (
+            SELECT product_id, SUM(rating) AS rating_sum, COUNT(id) AS rating_count
+            FROM product_reviews
+            GROUP BY product_id
+        ) AS totals
+        WHERE products.id = totals.product_id
+        """
+    )
+    op.create_index(
+        "ix_products_avg_rating_id",
+        "products",
+        [sa.text("avg_rating DESC NULLS LAST"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_avg_rating_id", table_name="products")
+    op.drop_column("products", "avg_rating")
+    op.drop_column("products", "rating_count")
+    op.drop_column("products", "rating_sum")
@@ -0,0 +1,20 @@
+"""add products product_category_id index"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3d8f1c6b7a42"
+down_revision = "9b3e7d5c2a10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_products_product_category_id", "products", ["product_category_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_product_category_id", table_name="products")
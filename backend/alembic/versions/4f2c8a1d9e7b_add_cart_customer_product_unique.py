@@ -0,0 +1,43 @@
+"""add unique customer/product constraint to cart"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "4f2c8a1d9e7b"
+down_revision = "0cdf14f89b6a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fold duplicate lines into the oldest one before enforcing uniqueness
+    op.execute(
+        """
+        UPDATE cart
+        SET quantity = totals.quantity
+        FROM (
+            SELECT MIN(id) AS id, SUM(quantity) AS quantity
+            FROM cart
+            GROUP BY customer_id, product_id
+            HAVING COUNT(id) > 1
+        ) AS totals
+        WHERE cart.id = totals.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM cart
+        USING cart AS kept
+        WHERE cart.customer_id = kept.customer_id
+          AND cart.product_id = kept.product_id
+          AND cart.id > kept.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_cart_customer_id_product_id", "cart", ["customer_id", "product_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_cart_customer_id_product_id", "cart", type_="unique")
@@ -0,0 +1,28 @@
+"""add order status rollup indexes"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "595f2a46366e"
+down_revision = "1b5d2a4e1f3c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_orders_processing",
+        "orders",
+        ["id"],
+        postgresql_where=sa.text("status = 'processing'"),
+    )
+    op.create_index(
+        "ix_order_items_order_id_status", "order_items", ["order_id", "status"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_items_order_id_status", table_name="order_items")
+    op.drop_index("ix_orders_processing", table_name="orders")
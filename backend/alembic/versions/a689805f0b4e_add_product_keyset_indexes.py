@@ -0,0 +1,29 @@
+"""add product keyset pagination indexes"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a689805f0b4e"
+down_revision = "595f2a46366e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_products_created_timestamp_id", "products", ["created_timestamp", "id"]
+    )
+    op.create_index(
+        "ix_products_vendor_id_created_timestamp_id",
+        "products",
+        ["vendor_id", "created_timestamp", "id"],
+    )
+    op.create_index("ix_products_price_id", "products", ["price", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_price_id", table_name="products")
+    op.drop_index("ix_products_vendor_id_created_timestamp_id", table_name="products")
+    op.drop_index("ix_products_created_timestamp_id", table_name="products")
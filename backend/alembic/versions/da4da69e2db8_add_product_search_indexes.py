@@ -0,0 +1,49 @@
+"""add product search indexes"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "da4da69e2db8"
+down_revision = "a689805f0b4e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX ix_products_search_document ON products USING gin "
+        "(to_tsvector('simple', coalesce(product_name, '') || ' ' "
+        "|| coalesce(short_description, '')))"
+    )
+    op.create_index(
+        "ix_products_product_name_trgm",
+        "products",
+        ["product_name"],
+        postgresql_using="gin",
+        postgresql_ops={"product_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_products_short_description_trgm",
+        "products",
+        ["short_description"],
+        postgresql_using="gin",
+        postgresql_ops={"short_description": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_product_category_category_name_trgm",
+        "product_category",
+        ["category_name"],
+        postgresql_using="gin",
+        postgresql_ops={"category_name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_product_category_category_name_trgm", table_name="product_category"
+    )
+    op.drop_index("ix_products_short_description_trgm", table_name="products")
+    op.drop_index("ix_products_product_name_trgm", table_name="products")
+    op.drop_index("ix_products_search_document", table_name="products")
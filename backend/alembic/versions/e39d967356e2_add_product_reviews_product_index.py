@@ -0,0 +1,25 @@
+"""add product_reviews product_id index"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e39d967356e2"
+down_revision = "da4da69e2db8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_product_reviews_product_id_created_timestamp",
+        "product_reviews",
+        ["product_id", "created_timestamp"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_product_reviews_product_id_created_timestamp",
+        table_name="product_reviews",
+    )
@@ -1,7 +1,12 @@
 from fastapi import Depends
 
 from core.paystack import get_paystack
+from core.redis import get_redis
 from crud import (
+    get_async_crud_cart,
+    get_async_crud_customer,
+    get_async_crud_product,
+    get_async_crud_product_category,
     get_crud_auth_user,
     get_crud_refresh_token,
     get_crud_otp,
@@ -13,8 +18,10 @@ from crud import (
     get_crud_product_review,
     get_crud_cart,
     get_crud_payment_details,
+    get_crud_payment_event,
     get_crud_order_item,
     get_crud_order,
+    get_cart_store,
 )
 from services import (
     AuthUserService,
@@ -34,6 +41,7 @@ def get_auth_user_service(
     queue_connection=Depends(get_queue_connection),
     crud_customer=Depends(get_crud_customer),
     crud_vendor=Depends(get_crud_vendor),
+    redis=Depends(get_redis),
 ) -> AuthUserService:
     return AuthUserService(
         crud_auth_user=crud_auth_user,
@@ -42,6 +50,7 @@ def get_auth_user_service(
         queue_connection=queue_connection,
         crud_customer=crud_customer,
         crud_vendor=crud_vendor,
+        redis=redis,
     )
 
 
@@ -80,6 +89,9 @@ def get_product_service(
     crud_product_category=Depends(get_crud_product_category),
     crud_product_image=Depends(get_crud_product_image),
     crud_product_review=Depends(get_crud_product_review),
+    redis=Depends(get_redis),
+    async_crud_product=Depends(get_async_crud_product),
+    async_crud_product_category=Depends(get_async_crud_product_category),
 ) -> ProductService:
     return ProductService(
         crud_auth_user=crud_auth_user,
@@ -88,6 +100,9 @@ def get_product_service(
         crud_product=crud_product,
         crud_product_image=crud_product_image,
         crud_product_review=crud_product_review,
+        redis=redis,
+        async_crud_product=async_crud_product,
+        async_crud_product_category=async_crud_product_category,
     )
 
 
@@ -102,6 +117,12 @@ def get_cart_service(
     crud_order_item=Depends(get_crud_order_item),
     crud_vendor=Depends(get_crud_vendor),
     paystack=Depends(get_paystack),
+    crud_payment_event=Depends(get_crud_payment_event),
+    cart_store=Depends(get_cart_store),
+    redis=Depends(get_redis),
+    async_crud_cart=Depends(get_async_crud_cart),
+    async_crud_product=Depends(get_async_crud_product),
+    async_crud_customer=Depends(get_async_crud_customer),
 ) -> CartService:
     return CartService(
         crud_auth_user=crud_auth_user,
@@ -114,6 +135,12 @@ def get_cart_service(
         crud_order_item=crud_order_item,
         crud_vendor=crud_vendor,
         paystack=paystack,
+        crud_payment_event=crud_payment_event,
+        cart_store=cart_store,
+        redis=redis,
+        async_crud_cart=async_crud_cart,
+        async_crud_product=async_crud_product,
+        async_crud_customer=async_crud_customer,
     )
 
 
@@ -7,6 +7,7 @@ from .product import router as product_router
 from .cart import router as cart_router
 from .order import router as order_router
 from .monitoring import router as monitoring_router
+from .payment import router as payment_router
 
 
 router = APIRouter()
@@ -18,4 +19,5 @@ router.include_router(vendor_router)
 router.include_router(product_router)
 router.include_router(order_router)
 router.include_router(cart_router)
+router.include_router(payment_router)
 router.include_router(monitoring_router)
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, BackgroundTasks, Header, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
+from redis.asyncio import Redis
 
-from core.schema import Tokens
+from core.redis import get_redis
+from crud import CRUDRefreshToken, get_crud_refresh_token
 from core.tokens import (
     deactivate_token,
     get_current_auth_user,
@@ -10,6 +12,7 @@ from core.tokens import (
 )
 
 from schemas import (
+    Tokens,
     AuthUserCreate,
     AuthUserResponse,
     LogoutResponse,
@@ -76,8 +79,15 @@ async def login_user(
 async def logout_user(
     token: TokenDeactivate,
     current_user: AuthUser = Depends(get_current_auth_user),
+    crud_refresh_token: CRUDRefreshToken = Depends(get_crud_refresh_token),
+    redis: Redis = Depends(get_redis),
 ):
-    await deactivate_token(token.access_token, auth_id=current_user.id)
+    await deactivate_token(
+        token.access_token,
+        auth_id=current_user.id,
+        crud_refresh_token=crud_refresh_token,
+        redis=redis,
+    )
     return LogoutResponse(logout=True)
 
 
@@ -116,6 +126,8 @@ async def refresh_access_token(
     token: RefreshTokenSchema,
     current_user: AuthUser = Depends(get_current_auth_user),
     user_agent: str = Header(None, description="Browser Info"),
+    crud_refresh_token: CRUDRefreshToken = Depends(get_crud_refresh_token),
+    redis: Redis = Depends(get_redis),
 ):
     # TODO: Allow unverified users refresh token
     return await regenerate_tokens(
@@ -123,6 +135,8 @@ async def refresh_access_token(
         user_agent=user_agent,
         auth_id=current_user.id,
         default_role=current_user.default_role,
+        crud_refresh_token=crud_refresh_token,
+        redis=redis,
     )
 
 
@@ -134,7 +148,6 @@ async def change_password(
 ):
     return await auth_user_service.change_password(
         data_obj=data_obj,
-        current_user_password=current_user.password,
         current_user_id=current_user.id,
     )
 
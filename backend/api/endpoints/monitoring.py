@@ -1,8 +1,19 @@
-from fastapi import APIRouter
+import logging
+
+from arq.constants import default_queue_name
+from fastapi import APIRouter, Depends, Response, status
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from starlette.responses import JSONResponse
 
-from schemas.base import HealthResponse
+from core.health import readiness_probe
+from core.metrics import ARQ_QUEUE_DEPTH, REDIS_ERRORS
+from core.redis import get_redis
+from schemas.base import HealthResponse, ReadinessResponse
+
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/monitoring")
 
@@ -10,3 +21,28 @@ router = APIRouter(prefix="/monitoring")
 @router.get("/health", response_model=HealthResponse)
 def check_system_health():
     return JSONResponse(content={"msg": "This is working perfectly"}, status_code=200)
+
+
+@router.get("/live", response_model=HealthResponse)
+async def check_liveness():
+    # The process is serving requests; dependencies are checked by /ready
+    return HealthResponse(msg="alive")
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def check_readiness(response: Response, redis: Redis = Depends(get_redis)):
+    result = await readiness_probe.check(redis)
+    if not result["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return result
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(redis: Redis = Depends(get_redis)):
+    try:
+        ARQ_QUEUE_DEPTH.set(await redis.zcard(default_queue_name))
+    except RedisError as e:
+        # Keep the last queue depth; the rest of the metrics are still useful
+        REDIS_ERRORS.labels(operation="queue_depth").inc()
+        logger.warning(f"Queue depth not refreshed, Redis unavailable: {e}")
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,21 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Request, status
+
+from api.dependencies.services import get_cart_service
+from services.cart_service import CartService
+
+
+router = APIRouter(prefix="/payments", tags=["Payments"])
+
+
+@router.post("/webhook", status_code=status.HTTP_200_OK)
+async def paystack_webhook(
+    request: Request,
+    x_paystack_signature: Optional[str] = Header(default=None),
+    cart_service: CartService = Depends(get_cart_service),
+):
+    await cart_service.ingest_paystack_webhook(
+        body=await request.body(), signature=x_paystack_signature
+    )
+    return {"status": "ok"}
@@ -1,9 +1,17 @@
-from fastapi import Depends, APIRouter, Query, status
+from typing import Dict
+
+from fastapi import Depends, APIRouter, Query, Request, Response, status
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
 
 from api.dependencies.services import get_product_service
+from core.redis import get_redis
+from core.response_cache import response_cache
 from core.tokens import get_current_verified_customer, get_current_verified_vendor
 from models import AuthUser
+from schemas.base import ProductSortEnum
 from schemas import (
+    ProductCategoryReturn,
     ProductCreate,
     ProductReturn,
     ProductUpdate,
@@ -17,9 +25,27 @@ from schemas import (
     ProductReviewUpdateReturn,
 )
 from services.product_service import ProductService
+from utils.cursor import next_page_cursor
 
 router = APIRouter(prefix="/products", tags=["Product"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+AFTER_DESCRIPTION = f"Cursor from the {NEXT_CURSOR_HEADER} header of the previous page"
+SORT_DESCRIPTION = (
+    "newest first, relevance to the search term or average rating "
+    "(relevance and rating are paged with skip)"
+)
+
+# Cached endpoints serialize up front so the JSON body itself can be stored
+PRODUCTS_ADAPTER = TypeAdapter(list[ProductsReturn])
+PRODUCT_LIST_ADAPTER = TypeAdapter(list[ProductReturn])
+PRODUCT_ADAPTER = TypeAdapter(ProductReturn)
+CATEGORIES_ADAPTER = TypeAdapter(list[ProductCategoryReturn])
+
+
+def _dump_json(adapter: TypeAdapter, data) -> bytes:
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
 
 @router.post(
     "",
@@ -39,53 +65,127 @@ async def create_product(
 
 @router.get("", response_model=list[ProductsReturn])
 async def get_products_customer(
+    request: Request,
     search: str = Query(
         default="", max_length=20, description="Search products with name or category"
     ),
     skip: int = Query(default=0),
     limit: int = Query(default=20),
+    after: str | None = Query(default=None, description=AFTER_DESCRIPTION),
+    sort: ProductSortEnum = Query(
+        default=ProductSortEnum.NEWEST, description=SORT_DESCRIPTION
+    ),
+    min_rating: float | None = Query(default=None, ge=0, le=5),
     product_service: ProductService = Depends(get_product_service),
+    redis: Redis = Depends(get_redis),
 ):
 
-    return await product_service.get_products_customer(
-        search=search, skip=skip, limit=limit
-    )
+    async def build():
+        products = await product_service.get_products_customer(
+            search=search,
+            skip=skip,
+            limit=limit,
+            after=after,
+            sort=sort,
+            min_rating=min_rating,
+        )
+        headers = {}
+        if sort == ProductSortEnum.NEWEST:
+            headers = _next_cursor_headers(products, limit, "created_timestamp", "id")
+        return _dump_json(PRODUCTS_ADAPTER, products), headers
+
+    return await response_cache.serve(request, redis, build)
 
 
 @router.get("/me", response_model=list[ProductReturn])
 async def get_products_vendor(
+    response: Response,
     search: str = Query(
         default="", max_length=20, description="Search products with name or category"
     ),
     skip: int = Query(default=0),
     limit: int = Query(default=10),
+    after: str | None = Query(default=None, description=AFTER_DESCRIPTION),
+    sort: ProductSortEnum = Query(
+        default=ProductSortEnum.NEWEST, description=SORT_DESCRIPTION
+    ),
     current_user: AuthUser = Depends(get_current_verified_vendor),
     product_service: ProductService = Depends(get_product_service),
 ):
 
-    return await product_service.get_products_vendor(
-        search=search, skip=skip, limit=limit, vendor_id=current_user.role_id
+    products = await product_service.get_products_vendor(
+        search=search,
+        skip=skip,
+        limit=limit,
+        vendor_id=current_user.role_id,
+        after=after,
+        sort=sort,
     )
+    if sort == ProductSortEnum.NEWEST:
+        _set_next_cursor(response, products, limit, "created_timestamp", "id")
+    return products
 
 
 @router.get("/price", response_model=list[ProductReturn])
 async def sort_product_by_price(
+    request: Request,
     skip: int = Query(default=0),
     limit: int = Query(default=20),
+    after: str | None = Query(default=None, description=AFTER_DESCRIPTION),
     product_service: ProductService = Depends(get_product_service),
+    redis: Redis = Depends(get_redis),
 ):
-    return await product_service.sort_product_by_price(
-        skip=skip,
-        limit=limit,
-    )
+    async def build():
+        products = await product_service.sort_product_by_price(
+            skip=skip,
+            limit=limit,
+            after=after,
+        )
+        return (
+            _dump_json(PRODUCT_LIST_ADAPTER, products),
+            _next_cursor_headers(products, limit, "price", "id"),
+        )
+
+    return await response_cache.serve(request, redis, build)
+
+
+@router.get("/categories", response_model=list[ProductCategoryReturn])
+async def get_product_categories(
+    request: Request,
+    product_service: ProductService = Depends(get_product_service),
+    redis: Redis = Depends(get_redis),
+):
+    async def build():
+        categories = await product_service.get_product_categories()
+        return _dump_json(CATEGORIES_ADAPTER, categories), {}
+
+    return await response_cache.serve(request, redis, build)
 
 
 @router.get("/{id}", response_model=ProductReturn)
 async def get_one_product(
     id: int,
+    request: Request,
     product_service: ProductService = Depends(get_product_service),
+    redis: Redis = Depends(get_redis),
 ):
-    return await product_service.get_one_product(product_id=id)
+    async def build():
+        product = await product_service.get_one_product(product_id=id)
+        return _dump_json(PRODUCT_ADAPTER, product), {}
+
+    return await response_cache.serve(request, redis, build)
+
+
+@router.get("/{id}/reviews", response_model=list[ProductReviewReturn])
+async def get_product_reviews(
+    id: int,
+    skip: int = Query(default=0),
+    limit: int = Query(default=20, le=100),
+    product_service: ProductService = Depends(get_product_service),
+):
+    return await product_service.get_product_reviews(
+        product_id=id, skip=skip, limit=limit
+    )
 
 
 @router.put("/{id}", response_model=ProductUpdateReturn)
@@ -157,3 +257,12 @@ async def update_product_review(
     return await product_service.update_product_review(
         review_id=review_id, data_obj=data_obj
     )
+
+
+def _next_cursor_headers(products, limit: int, *fields: str) -> Dict[str, str]:
+    next_cursor = next_page_cursor(products, limit, *fields)
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+
+def _set_next_cursor(response: Response, products, limit: int, *fields: str):
+    response.headers.update(_next_cursor_headers(products, limit, *fields))
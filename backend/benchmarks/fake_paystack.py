@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import uuid
+from datetime import datetime, timezone
+
+import uvicorn
+from fastapi import FastAPI
+
+
+def create_fake_paystack(latency_ms: int = 0) -> FastAPI:
+    """
+    Minimal stand-in for the Paystack transaction API used by checkout.
+
+    Every initialized transaction verifies as successful. ``latency_ms`` adds a
+    fixed delay to each call to mimic the real network round trip.
+    """
+    app = FastAPI()
+    transactions = {}
+
+    async def _delay():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    @app.post("/transaction/initialize")
+    async def initialize(payload: dict):
+        await _delay()
+        reference = uuid.uuid4().hex
+        transactions[reference] = payload
+        return {
+            "status": True,
+            "message": "Authorization URL created",
+            "data": {
+                "authorization_url": f"https://checkout.paystack.test/{reference}",
+                "access_code": reference[:12],
+                "reference": reference,
+            },
+        }
+
+    @app.get("/transaction/verify/{reference}")
+    async def verify(reference: str):
+        await _delay()
+        payload = transactions.get(reference, {})
+        return {
+            "status": True,
+            "message": "Verification successful",
+            "data": {
+                "status": "success" if payload else "failed",
+                "reference": reference,
+                "amount": payload.get("amount", 0),
+                "channel": payload.get("channel", "card"),
+                "paid_at": datetime.now(timezone.utc).isoformat(),
+                "metadata": payload.get("metadata", {}),
+                "customer": {"email": payload.get("email")},
+            },
+        }
+
+    return app
+
+
+class FakePaystackServer:
+    """Runs the fake Paystack app with uvicorn in a background thread."""
+
+    def __init__(self, port: int, latency_ms: int = 0):
+        self.port = port
+        self.server = uvicorn.Server(
+            uvicorn.Config(
+                create_fake_paystack(latency_ms),
+                host="127.0.0.1",
+                port=port,
+                log_level="warning",
+            )
+        )
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    def __enter__(self):
+        self._thread.start()
+        while not self.server.started:
+            threading.Event().wait(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self._thread.join()
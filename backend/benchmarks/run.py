@@ -0,0 +1,164 @@
+"""
+Benchmark the catalog and checkout hot paths against the real FastAPI app.
+
+The target database is wiped and reseeded, so point ``--database-url`` at a
+dedicated Postgres database. Redis must be reachable for token checks.
+
+    python -m benchmarks.run --database-url postgresql://.../zerosaver_bench
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCH_DATABASE_URL"),
+        help="Postgres database to wipe and seed (default: $BENCH_DATABASE_URL)",
+    )
+    parser.add_argument("--scenarios", nargs="+", default=None)
+    parser.add_argument("--iterations", type=int, default=200, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--vendors", type=int, default=20)
+    parser.add_argument("--products-per-vendor", type=int, default=100)
+    parser.add_argument("--reviews-per-product", type=int, default=5)
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--cart-items", type=int, default=3)
+    parser.add_argument("--paystack-port", type=int, default=8765)
+    parser.add_argument("--paystack-latency-ms", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="write results as JSON")
+    parser.add_argument(
+        "--max-queries",
+        type=int,
+        help="exit non-zero if any request issues more SQL statements than this",
+    )
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url or BENCH_DATABASE_URL is required")
+    if args.concurrency > args.customers:
+        parser.error("--concurrency cannot exceed --customers")
+    return args
+
+
+class NullQueue:
+    """Accepts enqueued jobs without Redis; the benchmark measures the API only."""
+
+    async def enqueue_job(self, *args, **kwargs):
+        return None
+
+
+async def run_scenario(app, name, args, seed_result, tokens):
+    from httpx import ASGITransport, AsyncClient
+
+    from benchmarks.scenarios import SCENARIOS, VirtualUser
+    from benchmarks.stats import ScenarioReport
+
+    report = ScenarioReport(scenario=name, duration_s=0)
+    remaining = iter(range(args.iterations))
+
+    async def worker(index):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            user = VirtualUser(
+                index=index,
+                client=client,
+                access_token=tokens[index],
+                report=report,
+                seed_result=seed_result,
+                rng=random.Random(args.seed + index),
+                concurrency=args.concurrency,
+            )
+            for _ in remaining:
+                await SCENARIOS[name](user)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(args.concurrency)))
+    report.duration_s = time.perf_counter() - start
+    return report
+
+
+async def run(args):
+    from redis.asyncio import Redis
+
+    from core.db import SessionLocal, async_engine, engine
+    from core.redis import create_redis_pool, get_redis
+    from core.tokens import generate_tokens
+    from main import app
+    from schemas.base import Roles
+    from task_queue.main import get_queue_connection
+
+    from benchmarks.fake_paystack import FakePaystackServer
+    from benchmarks.scenarios import scenario_names
+    from benchmarks.seed import SeedSizes, seed
+    from benchmarks.stats import format_table, install_query_counter
+
+    with SessionLocal() as db:
+        seed_result = seed(
+            db,
+            SeedSizes(
+                vendors=args.vendors,
+                products_per_vendor=args.products_per_vendor,
+                reviews_per_product=args.reviews_per_product,
+                customers=args.customers,
+                cart_items_per_customer=args.cart_items,
+            ),
+            rng_seed=args.seed,
+        )
+
+    install_query_counter(engine)
+    install_query_counter(async_engine.sync_engine)
+    app.dependency_overrides[get_queue_connection] = lambda: NullQueue()
+    # The app isn't started through its lifespan here, so hand it Redis directly
+    redis = Redis(connection_pool=create_redis_pool())
+    app.dependency_overrides[get_redis] = lambda: redis
+    tokens = [
+        generate_tokens(
+            user_id=auth_id, user_agent="benchmark", default_role=Roles.CUSTOMER
+        ).access_token
+        for auth_id in seed_result.customer_auth_ids
+    ]
+
+    rows = []
+    with FakePaystackServer(args.paystack_port, args.paystack_latency_ms):
+        for name in args.scenarios or scenario_names():
+            report = await run_scenario(app, name, args, seed_result, tokens)
+            rows.extend(report.rows())
+
+    print(format_table(rows))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+    if args.max_queries is not None:
+        over_budget = [row for row in rows if row["queries_max"] > args.max_queries]
+        for row in over_budget:
+            print(
+                f"{row['scenario']}/{row['request']}: {row['queries_max']} queries "
+                f"(budget {args.max_queries})",
+                file=sys.stderr,
+            )
+        return 1 if over_budget else 0
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Settings are read at import time, so point the app at the benchmark
+    # database and the fake Paystack server before importing it.
+    os.environ["SQLALCHEMY_DATABASE_URL"] = args.database_url
+    os.environ["PAYSTACK_BASE_URL"] = f"http://127.0.0.1:{args.paystack_port}/"
+    # Never send real confirmation emails from a benchmark run
+    os.environ["POSTMARK_SERVER_TOKEN"] = ""
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
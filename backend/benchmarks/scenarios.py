@@ -0,0 +1,108 @@
+import random
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from httpx import AsyncClient, Response
+
+from benchmarks.seed import WORDS, SeedResult
+from benchmarks.stats import ScenarioReport, track_queries
+
+
+class VirtualUser:
+    """One simulated customer issuing requests and recording their cost."""
+
+    def __init__(
+        self,
+        index: int,
+        client: AsyncClient,
+        access_token: str,
+        report: ScenarioReport,
+        seed_result: SeedResult,
+        rng: random.Random,
+        concurrency: int,
+    ):
+        self.index = index
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {access_token}"}
+        self.report = report
+        self.seed_result = seed_result
+        self.rng = rng
+        # Cart deletes are by product id, so users never share add-to-cart products
+        cart_products = set(seed_result.cart_product_ids)
+        self.own_products = [
+            product_id
+            for product_id in seed_result.product_ids
+            if product_id % concurrency == index and product_id not in cart_products
+        ]
+
+    async def request(self, label: str, method: str, url: str, **kwargs) -> Response:
+        with track_queries() as queries:
+            start = time.perf_counter()
+            rsp = await self.client.request(method, url, headers=self.headers, **kwargs)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        self.report.record(label, elapsed_ms, queries.count, rsp.status_code < 400)
+        return rsp
+
+
+async def browse(user: VirtualUser):
+    rsp = await user.request("feed", "GET", "/products", params={"limit": 20})
+    cursor = rsp.headers.get("X-Next-Cursor")
+    if cursor:
+        await user.request(
+            "feed next page", "GET", "/products", params={"limit": 20, "after": cursor}
+        )
+    product_id = user.rng.choice(user.seed_result.product_ids)
+    await user.request("product detail", "GET", f"/products/{product_id}")
+    await user.request("product reviews", "GET", f"/products/{product_id}/reviews")
+
+
+async def search(user: VirtualUser):
+    term = " ".join(user.rng.sample(WORDS, user.rng.randint(1, 2)))
+    await user.request(
+        "search",
+        "GET",
+        "/products",
+        params={"search": term, "sort": "relevance", "limit": 20},
+    )
+
+
+async def add_to_cart(user: VirtualUser):
+    product_id = user.rng.choice(user.own_products)
+    await user.request(
+        "cart add", "POST", "/cart/add", json={"product_id": product_id, "quantity": 1}
+    )
+    await user.request("cart summary", "GET", "/cart/summary")
+    await user.request("cart delete", "DELETE", f"/cart/{product_id}")
+
+
+async def _checkout(user: VirtualUser) -> Response:
+    return await user.request(
+        "checkout",
+        "POST",
+        "/cart/checkout",
+        json={"payment_details": {"payment_method": "card"}},
+    )
+
+
+async def checkout(user: VirtualUser):
+    await _checkout(user)
+
+
+async def verify_payment(user: VirtualUser):
+    rsp = await _checkout(user)
+    reference = (rsp.json().get("data") or {}).get("reference")
+    if reference:
+        await user.request("verify payment", "GET", f"/cart/verify-payment/{reference}")
+
+
+SCENARIOS: Dict[str, Callable[[VirtualUser], Awaitable[None]]] = {
+    "browse": browse,
+    "search": search,
+    "add_to_cart": add_to_cart,
+    "checkout": checkout,
+    "verify_payment": verify_payment,
+}
+
+
+def scenario_names() -> List[str]:
+    return list(SCENARIOS)
@@ -0,0 +1,168 @@
+import random
+from dataclasses import dataclass, field
+from typing import List
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from core.db import Base
+from models import AuthUser, Cart, Customer, Product, ProductCategory, Vendor
+from models.product import ProductReview
+from schemas.base import Roles
+from utils.password_utils import pwd_context
+
+CATEGORIES = ["Bakery", "Dairy", "Produce", "Pantry", "Drinks", "Frozen", "Snacks"]
+WORDS = [
+    "organic", "fresh", "bread", "sourdough", "milk", "cheese", "apple", "banana",
+    "tomato", "rice", "beans", "yam", "plantain", "juice", "coffee", "tea",
+    "chocolate", "cookie", "pepper", "onion", "honey", "yoghurt", "butter", "egg",
+]  # fmt: skip
+BENCH_PASSWORD = "2Strong"
+
+
+@dataclass
+class SeedSizes:
+    vendors: int = 20
+    products_per_vendor: int = 100
+    reviews_per_product: int = 5
+    customers: int = 50
+    cart_items_per_customer: int = 3
+
+
+@dataclass
+class SeedResult:
+    product_ids: List[int] = field(default_factory=list)
+    customer_auth_ids: List[int] = field(default_factory=list)
+    vendor_auth_ids: List[int] = field(default_factory=list)
+    # Products seeded into carts; the add-to-cart scenario avoids them
+    cart_product_ids: List[int] = field(default_factory=list)
+
+
+def reset_schema(db: Session):
+    bind = db.get_bind()
+    Base.metadata.drop_all(bind=bind)
+    Base.metadata.create_all(bind=bind)
+
+
+def _insert_returning_ids(db: Session, model, rows: List[dict]) -> List[int]:
+    if not rows:
+        return []
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(db.scalars(stmt, rows))
+
+
+def _create_users(db: Session, role: Roles, model, count: int, extra: dict):
+    password = pwd_context.hash(BENCH_PASSWORD)
+    auth_ids = _insert_returning_ids(
+        db,
+        AuthUser,
+        [
+            {
+                "email": f"{role.value}{i}@bench.local",
+                "password": password,
+                "default_role": role,
+                "email_verified": True,
+                "phone_verified": True,
+            }
+            for i in range(count)
+        ],
+    )
+    role_ids = _insert_returning_ids(
+        db,
+        model,
+        [
+            {
+                "auth_id": auth_id,
+                "first_name": f"{role.value.title()}{i}",
+                "last_name": "Bench",
+                "username": f"bench_{role.value}_{i}",
+                "country": "Nigeria",
+                "state": "Lagos",
+                "address": f"{i} Bench Street",
+                **extra,
+            }
+            for i, auth_id in enumerate(auth_ids)
+        ],
+    )
+    db.execute(
+        update(AuthUser),
+        [
+            {"id": auth_id, "role_id": role_id}
+            for auth_id, role_id in zip(auth_ids, role_ids)
+        ],
+    )
+    return auth_ids, role_ids
+
+
+def seed(db: Session, sizes: SeedSizes, rng_seed: int = 42) -> SeedResult:
+    """Wipe the schema and seed a deterministic catalog, reviews and carts."""
+    rng = random.Random(rng_seed)
+    reset_schema(db)
+    result = SeedResult()
+
+    result.vendor_auth_ids, vendor_ids = _create_users(
+        db, Roles.VENDOR, Vendor, sizes.vendors, {"bio": "Benchmark vendor"}
+    )
+    result.customer_auth_ids, customer_ids = _create_users(
+        db, Roles.CUSTOMER, Customer, sizes.customers, {}
+    )
+    category_ids = _insert_returning_ids(
+        db, ProductCategory, [{"category_name": name} for name in CATEGORIES]
+    )
+
+    product_rows, product_ratings = [], []
+    for vendor_id in vendor_ids:
+        for _ in range(sizes.products_per_vendor):
+            name = " ".join(rng.sample(WORDS, 3))
+            short_desc = " ".join(rng.sample(WORDS, 4))[:50]
+            review_total = rng.randint(0, sizes.reviews_per_product)
+            ratings = [rng.randint(1, 5) for _ in range(review_total)]
+            product_ratings.append(ratings)
+            product_rows.append(
+                {
+                    "vendor_id": vendor_id,
+                    "product_name": name,
+                    "short_description": short_desc,
+                    "long_description": f"{name}. {short_desc}.",
+                    "sku": f"BENCH-{len(product_rows):08d}",
+                    "product_status": True,
+                    # Large stock so repeated checkouts never run out
+                    "stock": 1_000_000,
+                    "price": rng.randint(100, 50_000),
+                    "product_category_id": rng.choice(category_ids),
+                    "rating_sum": sum(ratings),
+                    "rating_count": len(ratings),
+                    "avg_rating": sum(ratings) / len(ratings) if ratings else None,
+                }
+            )
+    result.product_ids = _insert_returning_ids(db, Product, product_rows)
+
+    review_rows = [
+        {
+            "product_id": product_id,
+            "review": f"Rated {rating} in benchmark",
+            "rating": rating,
+        }
+        for product_id, ratings in zip(result.product_ids, product_ratings)
+        for rating in ratings
+    ]
+    if review_rows:
+        db.execute(insert(ProductReview), review_rows)
+
+    cart_pool = result.product_ids[: sizes.cart_items_per_customer * 4]
+    result.cart_product_ids = cart_pool
+    items_per_cart = min(sizes.cart_items_per_customer, len(cart_pool))
+    cart_rows = [
+        {
+            "customer_id": customer_id,
+            "product_id": product_id,
+            "quantity": rng.randint(1, 3),
+        }
+        for customer_id in customer_ids
+        for product_id in rng.sample(cart_pool, items_per_cart)
+    ]
+    if cart_rows:
+        db.execute(insert(Cart), cart_rows)
+
+    db.commit()
+    return result
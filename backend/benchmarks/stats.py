@@ -0,0 +1,105 @@
+import math
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Set per request by the scenario runner; SQL executed while it is set counts
+# towards that request.
+_current_queries: ContextVar[Optional[List[int]]] = ContextVar(
+    "benchmark_current_queries", default=None
+)
+
+
+def install_query_counter(engine: Engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        counter = _current_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+class track_queries:
+    """Count SQL statements executed inside the ``with`` block."""
+
+    def __enter__(self):
+        self.counter = [0]
+        self._token = _current_queries.set(self.counter)
+        return self
+
+    def __exit__(self, *exc):
+        _current_queries.reset(self._token)
+
+    @property
+    def count(self) -> int:
+        return self.counter[0]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class RequestSamples:
+    latencies_ms: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+
+
+@dataclass
+class ScenarioReport:
+    scenario: str
+    duration_s: float
+    requests: Dict[str, RequestSamples] = field(
+        default_factory=lambda: defaultdict(RequestSamples)
+    )
+
+    def record(self, label: str, latency_ms: float, queries: int, ok: bool):
+        samples = self.requests[label]
+        samples.latencies_ms.append(latency_ms)
+        samples.queries.append(queries)
+        if not ok:
+            samples.errors += 1
+
+    def rows(self) -> List[dict]:
+        rows = []
+        for label, samples in self.requests.items():
+            latencies = sorted(samples.latencies_ms)
+            rows.append(
+                {
+                    "scenario": self.scenario,
+                    "request": label,
+                    "count": len(latencies),
+                    "errors": samples.errors,
+                    "rps": round(len(latencies) / self.duration_s, 1)
+                    if self.duration_s
+                    else 0.0,
+                    "p50_ms": round(percentile(latencies, 50), 2),
+                    "p95_ms": round(percentile(latencies, 95), 2),
+                    "p99_ms": round(percentile(latencies, 99), 2),
+                    "queries_avg": round(
+                        sum(samples.queries) / max(len(samples.queries), 1), 2
+                    ),
+                    "queries_max": max(samples.queries, default=0),
+                }
+            )
+        return rows
+
+
+def format_table(rows: List[dict]) -> str:
+    if not rows:
+        return ""
+    headers = list(rows[0])
+    widths = {h: max(len(h), *(len(str(row[h])) for row in rows)) for h in headers}
+    lines = ["  ".join(h.ljust(widths[h]) for h in headers)]
+    lines.append("  ".join("-" * widths[h] for h in headers))
+    for row in rows:
+        lines.append("  ".join(str(row[h]).ljust(widths[h]) for h in headers))
+    return "\n".join(lines)
@@ -0,0 +1,27 @@
+"""
+Recompute every product's review aggregates from product_reviews.
+
+Run it once on databases created before the aggregates existed without
+Alembic, or whenever they might have drifted:
+
+    python -m commands.backfill_rating_aggregates
+"""
+
+import asyncio
+
+from core.db import SessionLocal
+from crud import get_crud_product
+
+
+async def backfill_rating_aggregates() -> int:
+    with SessionLocal() as db:
+        return await get_crud_product(db).backfill_rating_aggregates()
+
+
+def main():
+    updated = asyncio.run(backfill_rating_aggregates())
+    print(f"Recomputed rating aggregates for {updated} products")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,17 +23,65 @@ class Settings(BaseSettings):
     SQLALCHEMY_DATABASE_URL: str = ""
     DATABASE_URL: str = ""  # Railway uses this variable name
     TEST_SQLALCHEMY_DATABASE_URL: str = ""
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a pooled connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT: int = 15000  # milliseconds, 0 disables the timeout
+    DEBUG: bool = False
+    SLOW_QUERY_THRESHOLD_MS: int = 200
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: int = 5  # seconds to wait for a free connection
+    REDIS_CONNECT_TIMEOUT: int = 2  # seconds
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # seconds idle before a PING on reuse
+    CART_BACKEND: str = "database"  # "database" or "redis"
+    CART_REDIS_TTL: int = 7 * 24 * 60 * 60  # seconds an idle Redis cart is kept
+    CART_FLUSH_BATCH_SIZE: int = 100
+    READINESS_CACHE_TTL: float = 2  # seconds a readiness result is reused
+    READINESS_TIMEOUT: float = 1  # seconds allowed per dependency check
+    DB_STARTUP_MAX_RETRIES: int = 5
+    DB_STARTUP_RETRY_DELAY: float = 1  # seconds, doubled after every failure
+    WORKER_METRICS_PORT: int = 9100  # 0 disables the worker's metrics server
     JWT_SECRET_KEY: str = ""
     ALGORITHM: str = ""
     ACCESS_TOKEN_EXPIRY_TIME: int = 20
     REFRESH_TOKEN_EXPIRY_TIME: int = 30
     FORGET_PASSWORD_EXPIRY_TIME: int = 5
+    TOKEN_REVOCATION_CACHE_SIZE: int = 10000
+    TOKEN_REVOCATION_LOCAL_TTL: int = 2  # seconds a "not revoked" answer is trusted
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 30  # seconds, in-process tier
+    PRINCIPAL_CACHE_REDIS_ENABLED: bool = False
+    PRINCIPAL_CACHE_REDIS_TTL: int = 300  # seconds, shared Redis tier
+    RESPONSE_CACHE_SIZE: int = 1000
+    RESPONSE_CACHE_TTL: int = 30  # seconds, in-process tier
+    RESPONSE_CACHE_REDIS_ENABLED: bool = False  # share bodies across pods
+    RESPONSE_CACHE_REDIS_TTL: int = 300  # seconds, shared Redis tier
+    RESPONSE_CACHE_MAX_AGE: int = 10  # seconds clients may reuse without asking
+    PASSWORD_HASH_ROUNDS: int = 29000  # pbkdf2_sha256 iterations
+    PASSWORD_HASH_WORKERS: int = 2  # processes in the hashing pool
+    PASSWORD_HASH_CONCURRENCY: int = 4  # hashes allowed in flight at once
+    HTTP_TIMEOUT: float = 10  # seconds for read/write/pool waits
+    HTTP_CONNECT_TIMEOUT: float = 3  # seconds
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30  # seconds an idle connection is kept
+    HTTP2_ENABLED: bool = True  # used when the h2 package is installed
+    HTTP_CONNECT_RETRIES: int = 2
+    HTTP_RETRIES: int = 2  # retries of idempotent calls on timeouts and 5xx
+    HTTP_RETRY_BACKOFF: float = 0.2  # seconds, doubled after every retry
     STRIPE_PUBLISHABLE_KEY: str = ""
     STRIPE_SECRET_KEY: str = ""
     POSTMARK_SERVER_TOKEN: str = ""
     POSTMARK_FROM_EMAIL: str = ""
+    PAYMENT_CLAIM_TIMEOUT: int = 120  # seconds before a stuck claim can be retaken
+    UNPAID_ORDER_EXPIRY: int = 30  # minutes a card/transfer order holds its stock
+    EMAIL_BATCH_WINDOW: int = 2  # seconds confirmations wait to be batched
+    EMAIL_MAX_TRIES: int = 5  # must not exceed the arq worker's max_tries
+    EMAIL_RETRY_DELAY: int = 10  # seconds, multiplied by the attempt number
     # Notification Service Configuration
     NOTIFICATION_SERVICE_URL: str = "http://localhost:8001"  # Default to local mock service
     NOTIFICATION_SERVICE_API_KEY: str = ""  # API key for authentication (if needed)
@@ -51,6 +99,13 @@ class Settings(BaseSettings):
             url = url.replace("postgres://", "postgresql://", 1)
         return url
 
+    @property
+    def async_database_url(self) -> str:
+        """Get the database URL with the asyncpg driver for the async engine."""
+        url = self.database_url
+        scheme, _, rest = url.partition("://")
+        return f"{scheme.split('+')[0]}+asyncpg://{rest}"
+
     class Config:
         env_path = env_path
         env_file_encoding = "utf-8"
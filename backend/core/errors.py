@@ -27,6 +27,13 @@ class InvalidRequest(HTTPException):
         super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=message)
 
 
+class ServiceUnavailable(HTTPException):
+    def __init__(self, message="Service temporarily unavailable, try again shortly"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=message
+        )
+
+
 class CredentialException(HTTPException):
     def __init__(self, detail: str = "Invalid Credentials"):
         super().__init__(
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from arq.constants import default_queue_name
+from redis.asyncio import Redis
+from sqlalchemy import text
+
+from core import settings
+from core.db import async_engine, engine
+
+
+def ping_database():
+    # Goes through the application pool, so an exhausted pool fails the check
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def _check_database():
+    # Awaited on the async engine so the probe timeout can cancel it; a thread
+    # left behind by a timed-out sync ping would keep holding a connection
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _check_redis(redis: Redis):
+    await redis.ping()
+
+
+class ReadinessProbe:
+    """
+    Runs dependency checks with tight timeouts and caches the result.
+
+    Only one round of checks is in flight at a time; probes arriving meanwhile
+    wait for it, so a slow dependency never causes checks to pile up.
+    """
+
+    def __init__(self, cache_ttl: float, timeout: float):
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self._result: Optional[dict] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._result is not None
+            and time.monotonic() - self._checked_at < self.cache_ttl
+        )
+
+    async def check(self, redis: Redis) -> dict:
+        if self._is_fresh():
+            return self._result
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._is_fresh():
+                self._result = await self._run_checks(redis)
+                self._checked_at = time.monotonic()
+        return self._result
+
+    async def _run_checks(self, redis: Redis) -> dict:
+        checks = {"database": _check_database(), "redis": _check_redis(redis)}
+        outcomes = await asyncio.gather(
+            *(asyncio.wait_for(check, self.timeout) for check in checks.values()),
+            return_exceptions=True,
+        )
+        results: Dict[str, str] = {
+            name: (
+                f"failed: {type(outcome).__name__}"
+                if isinstance(outcome, BaseException)
+                else "ok"
+            )
+            for name, outcome in zip(checks, outcomes)
+        }
+        queue_depth = None
+        if results["redis"] == "ok":
+            try:
+                queue_depth = await asyncio.wait_for(
+                    redis.zcard(default_queue_name), self.timeout
+                )
+            except Exception:
+                pass
+        return {
+            "ready": all(result == "ok" for result in results.values()),
+            "checks": results,
+            "queue_depth": queue_depth,
+        }
+
+
+readiness_probe = ReadinessProbe(
+    cache_ttl=settings.READINESS_CACHE_TTL, timeout=settings.READINESS_TIMEOUT
+)
@@ -0,0 +1,98 @@
+import asyncio
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from core import settings
+
+POSTMARK_BASE_URL = "https://api.postmarkapp.com"
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client(
+    base_url: str, headers: Optional[dict] = None
+) -> httpx.AsyncClient:
+    """Keep-alive client with explicit timeouts, pool limits and connect retries."""
+    transport = httpx.AsyncHTTPTransport(
+        http2=settings.HTTP2_ENABLED and _http2_available(),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        # Failing to connect means nothing was sent, so it is always safe to retry
+        retries=settings.HTTP_CONNECT_RETRIES,
+    )
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+        ),
+        transport=transport,
+    )
+
+
+async def request_with_retries(
+    client: httpx.AsyncClient, method: str, url: str, **kwargs
+) -> httpx.Response:
+    """
+    Retry timeouts and 429/5xx gateway responses with exponential backoff.
+
+    Only use this for idempotent requests.
+    """
+    retries = settings.HTTP_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            rsp = await client.request(method, url, **kwargs)
+        except httpx.TimeoutException:
+            if attempt == retries:
+                raise
+        else:
+            if rsp.status_code not in RETRYABLE_STATUS_CODES or attempt == retries:
+                return rsp
+        await asyncio.sleep(settings.HTTP_RETRY_BACKOFF * 2**attempt)
+
+
+def _get_client(name: str, build: Callable[[], httpx.AsyncClient]):
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = build()
+    return client
+
+
+def get_paystack_http_client() -> httpx.AsyncClient:
+    return _get_client(
+        "paystack",
+        lambda: create_http_client(
+            base_url=settings.paystack_config.BASE_URL,
+            headers={"Authorization": f"Bearer {settings.paystack_config.SECRET_KEY}"},
+        ),
+    )
+
+
+def get_postmark_http_client() -> httpx.AsyncClient:
+    return _get_client(
+        "postmark",
+        lambda: create_http_client(
+            base_url=POSTMARK_BASE_URL,
+            headers={"X-Postmark-Server-Token": settings.POSTMARK_SERVER_TOKEN},
+        ),
+    )
+
+
+async def close_http_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
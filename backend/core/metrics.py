@@ -0,0 +1,59 @@
+from typing import Callable
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.engine import Engine
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being served"
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed while serving a request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements while serving a request",
+    ["method", "route"],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Connections in the SQLAlchemy pool", ["engine", "state"]
+)
+ARQ_QUEUE_DEPTH = Gauge("arq_queue_depth", "Jobs waiting in the arq queue")
+ARQ_JOB_QUEUE_DELAY = Histogram(
+    "arq_job_queue_delay_seconds", "Time a job waited in the queue before starting"
+)
+ARQ_JOB_DURATION = Histogram("arq_job_duration_seconds", "Time to run an arq job")
+PAYSTACK_REQUEST_LATENCY = Histogram(
+    "paystack_request_duration_seconds", "Paystack API call latency", ["operation"]
+)
+PAYSTACK_ERRORS = Counter(
+    "paystack_request_errors_total", "Failed Paystack API calls", ["operation"]
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Cache lookups by outcome", ["cache", "result"]
+)
+REDIS_ERRORS = Counter(
+    "redis_errors_total", "Redis calls that failed and were degraded", ["operation"]
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "Password hashes waiting for a worker slot"
+)
+
+
+def register_pool_metrics(name: str, engine: Engine):
+    """Report the engine's pool usage whenever metrics are collected."""
+    pool = engine.pool
+    states: dict[str, Callable[[], int]] = {
+        "size": pool.size,
+        "checked_out": pool.checkedout,
+        "overflow": pool.overflow,
+    }
+    for state, read in states.items():
+        DB_POOL_CONNECTIONS.labels(engine=name, state=state).set_function(read)
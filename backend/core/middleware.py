@@ -1,10 +1,22 @@
+import asyncio
 import logging
 import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
 
-import psycopg2
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 from core import settings
 from core.errors import DatabaseConnectionError
+from core.health import ping_database
+from core.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,23 +38,138 @@ logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
 
-def start_up_db():
-    retries = 0
-    max_retries = 3
-    retry_delay = 5
-    while retries < max_retries:
+async def start_up_db():
+    """Wait for the database with exponential backoff, using the app's engine."""
+    delay = settings.DB_STARTUP_RETRY_DELAY
+    max_retries = settings.DB_STARTUP_MAX_RETRIES
+    for attempt in range(1, max_retries + 1):
         try:
-            conn = psycopg2.connect(settings.database_url)
+            await asyncio.to_thread(ping_database)
             logger.info("Database Connection Successfull")
             return
         except Exception as error:
-            retries += 1
             logger.error(
-                f"Database connection failed (Attempts: {retries}/{max_retries})"
+                f"Database connection failed (Attempts: {attempt}/{max_retries})"
             )
             logger.error("Error: %s", error)
-            time.sleep(retry_delay)
+            if attempt < max_retries:
+                await asyncio.sleep(delay)
+                delay *= 2
     logger.error(
         "Failed to establish database connection after %d attempts", max_retries
     )
     raise DatabaseConnectionError
+
+
+@dataclass
+class RequestQueryStats:
+    scope: dict
+    count: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def route(self) -> str:
+        return route_name(self.scope)
+
+
+def route_name(scope: dict) -> str:
+    # Set by the router once the request has been matched; templated paths
+    # keep the label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+_request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def install_query_instrumentation(engine: Engine):
+    """Count and time every statement run on ``engine``, logging slow ones."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, params, context, many):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, params, context, many):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        stats = _request_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.total_seconds += elapsed
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                "Slow query (%.1f ms) on %s: %s",
+                elapsed * 1000,
+                stats.route if stats else "background",
+                statement,
+            )
+
+
+class QueryCountMiddleware:
+    """
+    Records the number of SQL statements and the time spent in them per request.
+
+    Totals go to the request histograms; in debug mode they are also returned
+    as ``X-DB-Query-Count`` and ``X-DB-Time-Ms`` response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope=scope)
+        token = _request_query_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append(
+                    (b"x-db-time-ms", f"{stats.total_seconds * 1000:.2f}".encode())
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _request_query_stats.reset(token)
+            labels = {"method": scope["method"], "route": stats.route}
+            DB_QUERIES_PER_REQUEST.labels(**labels).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(**labels).observe(stats.total_seconds)
+
+
+class RequestMetricsMiddleware:
+    """Tracks in-flight requests and request latency per route and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_LATENCY.labels(
+                method=scope["method"], route=route_name(scope), status=status_code
+            ).observe(time.perf_counter() - start)
@@ -1,7 +1,13 @@
-from httpx import AsyncClient
+from httpx import AsyncClient, Response
+import hashlib
+import hmac
 import logging
+import time
+from typing import Optional
 
 from core import settings
+from core.http_clients import get_paystack_http_client, request_with_retries
+from core.metrics import PAYSTACK_ERRORS, PAYSTACK_REQUEST_LATENCY
 from models import Customer, Order
 
 logger = logging.getLogger(__name__)
@@ -9,11 +15,28 @@ logger = logging.getLogger(__name__)
 
 class PaystackClient:
 
-    def __init__(self, client=AsyncClient):
-        self.client: AsyncClient = client(
-            base_url=settings.paystack_config.BASE_URL,
-            headers={"Authorization": f"Bearer {settings.paystack_config.SECRET_KEY}"},
-        )
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def _request(
+        self, operation, method, url, retry=False, **kwargs
+    ) -> Response:
+        start = time.perf_counter()
+        try:
+            if retry:
+                rsp = await request_with_retries(self.client, method, url, **kwargs)
+            else:
+                rsp = await self.client.request(method, url, **kwargs)
+        except Exception:
+            PAYSTACK_ERRORS.labels(operation=operation).inc()
+            raise
+        finally:
+            PAYSTACK_REQUEST_LATENCY.labels(operation=operation).observe(
+                time.perf_counter() - start
+            )
+        if rsp.is_error:
+            PAYSTACK_ERRORS.labels(operation=operation).inc()
+        return rsp
 
     async def initialize_payment(self, email, amount, channel, **kwargs):
         customer: Customer = kwargs.get("customer")
@@ -33,7 +56,9 @@ class PaystackClient:
             ],
         }
         try:
-            rsp = await self.client.post(
+            rsp = await self._request(
+                "initialize",
+                "POST",
                 "transaction/initialize",
                 json={
                     "email": email,
@@ -51,7 +76,9 @@ class PaystackClient:
 
     async def verify_payment(self, payment_ref):
         try:
-            rsp = await self.client.get(url=f"transaction/verify/{payment_ref}")
+            rsp = await self._request(
+                "verify", "GET", f"transaction/verify/{payment_ref}", retry=True
+            )
             rsp_data = rsp.json()["data"]
 
         except Exception as e:
@@ -60,5 +87,15 @@ class PaystackClient:
         return rsp_data
 
 
+def verify_webhook_signature(body: bytes, signature: Optional[str]) -> bool:
+    """Check ``x-paystack-signature``: HMAC-SHA512 of the raw body with our key."""
+    if not signature or not settings.paystack_config.SECRET_KEY:
+        return False
+    expected = hmac.new(
+        settings.paystack_config.SECRET_KEY.encode(), body, hashlib.sha512
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
 def get_paystack():
-    return PaystackClient()
+    return PaystackClient(client=get_paystack_http_client())
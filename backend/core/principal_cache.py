@@ -0,0 +1,108 @@
+import logging
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from core import settings
+from core.cache import TTLCache
+from core.metrics import CACHE_LOOKUPS, REDIS_ERRORS
+from core.schema import CachedPrincipal
+from models.auth_user import AuthUser
+
+PRINCIPAL_KEY_PREFIX = "principal:"
+PRINCIPAL_VERSION_KEY_PREFIX = "principal_version:"
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users, keyed by user id.
+
+    Cached principals are detached ``AuthUser`` copies without the password
+    hash. Users who haven't created their customer/vendor account yet are not
+    cached, because the background worker fills in their ``role_id``.
+
+    Every entry is stored under the user's version counter in Redis, which
+    ``invalidate`` bumps. Each lookup reads the current version first, so a
+    change made by the worker or another API process takes effect on the next
+    request everywhere, even with the Redis body tier disabled. If Redis is
+    unreachable the cache is bypassed and principals are loaded from the
+    database.
+    """
+
+    def __init__(self, local_cache: TTLCache, use_redis: bool, redis_ttl: int):
+        self.local_cache = local_cache
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+
+    async def version(self, redis: Redis, user_id: int) -> Optional[int]:
+        """Current version of ``user_id``'s principal, ``None`` if unknown."""
+        try:
+            version = await redis.get(f"{PRINCIPAL_VERSION_KEY_PREFIX}{user_id}")
+        except RedisError as e:
+            REDIS_ERRORS.labels(operation="principal_version").inc()
+            logger.warning(f"Principal cache bypassed, Redis unavailable: {e}")
+            return None
+        return int(version or 0)
+
+    async def get(
+        self, redis: Redis, user_id: int, version: Optional[int]
+    ) -> Optional[AuthUser]:
+        if version is None:
+            return None
+        principal = self.local_cache.get((user_id, version))
+        if principal is None and self.use_redis:
+            cached_json = await redis.get(self._redis_key(user_id, version))
+            CACHE_LOOKUPS.labels(
+                cache="principal_redis", result="hit" if cached_json else "miss"
+            ).inc()
+            if cached_json:
+                principal = CachedPrincipal.model_validate_json(cached_json)
+                self.local_cache.set((user_id, version), principal)
+        if principal is None:
+            return None
+        return AuthUser(**principal.model_dump())
+
+    async def set(self, redis: Redis, auth_user: AuthUser, version: Optional[int]):
+        """
+        Cache ``auth_user`` under ``version``, which must be read before the
+        user was loaded so a concurrent invalidation isn't overwritten.
+        """
+        if version is None:
+            return
+        if not isinstance(auth_user, AuthUser) or not auth_user.role_id:
+            return
+        principal = CachedPrincipal.model_validate(auth_user, from_attributes=True)
+        self.local_cache.set((auth_user.id, version), principal)
+        if self.use_redis:
+            await redis.set(
+                self._redis_key(auth_user.id, version),
+                principal.model_dump_json(),
+                ex=self.redis_ttl,
+            )
+
+    async def invalidate(self, redis: Redis, user_id: int):
+        try:
+            await redis.incr(f"{PRINCIPAL_VERSION_KEY_PREFIX}{user_id}")
+        except RedisError as e:
+            # lookups bypass the cache while Redis is down, so only entries
+            # cached before the outage can outlive this, for at most their TTL
+            REDIS_ERRORS.labels(operation="principal_invalidate").inc()
+            logger.error(f"Could not invalidate principal {user_id}: {e}")
+
+    @staticmethod
+    def _redis_key(user_id: int, version: int) -> str:
+        return f"{PRINCIPAL_KEY_PREFIX}{user_id}:{version}"
+
+
+principal_cache = PrincipalCache(
+    local_cache=TTLCache(
+        maxsize=settings.PRINCIPAL_CACHE_SIZE,
+        ttl=settings.PRINCIPAL_CACHE_TTL,
+        name="principal",
+    ),
+    use_redis=settings.PRINCIPAL_CACHE_REDIS_ENABLED,
+    redis_ttl=settings.PRINCIPAL_CACHE_REDIS_TTL,
+)
@@ -0,0 +1,29 @@
+from fastapi import Request
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from core import settings
+
+
+def create_redis_pool() -> BlockingConnectionPool:
+    """
+    Build the Redis connection pool shared by caches and the arq queue.
+
+    Connections belong to the event loop that opens them, so the app creates
+    one pool at startup and keeps it on ``app.state``; the worker uses the
+    connection arq sets up in ``ctx["redis"]``. Callers wait up to
+    ``REDIS_POOL_TIMEOUT`` for a free connection once ``REDIS_MAX_CONNECTIONS``
+    are in use, so connection counts stay flat under load.
+    """
+    return BlockingConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    )
+
+
+def get_redis(request: Request) -> Redis:
+    """Shared Redis client created at app startup."""
+    return request.app.state.redis
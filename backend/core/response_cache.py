@@ -0,0 +1,148 @@
+import hashlib
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from core import settings
+from core.cache import TTLCache
+from core.metrics import CACHE_LOOKUPS, REDIS_ERRORS
+
+RESPONSE_KEY_PREFIX = "response:"
+CATALOG_VERSION_KEY = "response:catalog_version"
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(BaseModel):
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = {}
+
+
+class ResponseCache:
+    """
+    Serialized responses for public catalog reads, keyed by path and query.
+
+    Every key embeds a catalog version; any product or stock write bumps it,
+    which orphans all cached pages at once instead of tracking which pages a
+    product appears on. Old entries simply age out of both tiers. The version
+    always lives in Redis, even when bodies are only cached in process, so
+    bumps from checkout, the worker or another instance are seen on the next
+    request. If Redis is unreachable responses are built without caching.
+    """
+
+    def __init__(
+        self, local_cache: TTLCache, use_redis: bool, redis_ttl: int, max_age: int
+    ):
+        self.local_cache = local_cache
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self.max_age = max_age
+
+    async def serve(
+        self,
+        request: Request,
+        redis: Redis,
+        build: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]],
+    ) -> Response:
+        """Answer from cache, or ``build()`` the ``(json_body, headers)`` once."""
+        version = await self._version(redis)
+        if version is None:
+            return self._respond(request, await self._build(build))
+        key = f"{version}:{self._request_key(request)}"
+        cached = await self.get(redis, key)
+        if cached is None:
+            cached = await self._build(build)
+            await self.set(redis, key, cached)
+        return self._respond(request, cached)
+
+    async def get(self, redis: Redis, key: str) -> Optional[CachedResponse]:
+        cached = self.local_cache.get(key)
+        if cached is None and self.use_redis:
+            cached_json = await redis.get(f"{RESPONSE_KEY_PREFIX}{key}")
+            CACHE_LOOKUPS.labels(
+                cache="response_redis", result="hit" if cached_json else "miss"
+            ).inc()
+            if cached_json:
+                cached = CachedResponse.model_validate_json(cached_json)
+                self.local_cache.set(key, cached)
+        return cached
+
+    async def set(self, redis: Redis, key: str, cached: CachedResponse):
+        self.local_cache.set(key, cached)
+        if self.use_redis:
+            await redis.set(
+                f"{RESPONSE_KEY_PREFIX}{key}",
+                cached.model_dump_json(),
+                ex=self.redis_ttl,
+            )
+
+    async def invalidate(self, redis: Redis):
+        self.local_cache.clear()
+        try:
+            await redis.incr(CATALOG_VERSION_KEY)
+        except RedisError as e:
+            REDIS_ERRORS.labels(operation="catalog_invalidate").inc()
+            logger.error(f"Could not bump the catalog version: {e}")
+
+    async def _version(self, redis: Redis) -> Optional[int]:
+        try:
+            return int(await redis.get(CATALOG_VERSION_KEY) or 0)
+        except RedisError as e:
+            REDIS_ERRORS.labels(operation="catalog_version").inc()
+            logger.warning(f"Response cache bypassed, Redis unavailable: {e}")
+            return None
+
+    async def _build(
+        self, build: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+    ) -> CachedResponse:
+        body, headers = await build()
+        return CachedResponse(body=body, etag=self._etag(body), headers=headers)
+
+    @staticmethod
+    def _request_key(request: Request) -> str:
+        # Same params in any order (or repeated blanks) share one entry
+        params = sorted(
+            (name, value) for name, value in request.query_params.multi_items() if value
+        )
+        return f"{request.url.path}?{'&'.join(f'{n}={v}' for n, v in params)}"
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    def _respond(self, request: Request, cached: CachedResponse) -> Response:
+        headers = {
+            **cached.headers,
+            "ETag": cached.etag,
+            "Cache-Control": f"public, max-age={self.max_age}",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self._etag_matches(if_none_match, cached.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(
+            content=cached.body, media_type="application/json", headers=headers
+        )
+
+    @staticmethod
+    def _etag_matches(if_none_match: str, etag: str) -> bool:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or any(
+            tag.removeprefix("W/") == etag for tag in candidates
+        )
+
+
+response_cache = ResponseCache(
+    local_cache=TTLCache(
+        maxsize=settings.RESPONSE_CACHE_SIZE,
+        ttl=settings.RESPONSE_CACHE_TTL,
+        name="response",
+    ),
+    use_redis=settings.RESPONSE_CACHE_REDIS_ENABLED,
+    redis_ttl=settings.RESPONSE_CACHE_REDIS_TTL,
+    max_age=settings.RESPONSE_CACHE_MAX_AGE,
+)
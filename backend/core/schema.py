@@ -1,17 +1,33 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel
 
 from schemas.base import Roles
 
 
-class Tokens(BaseModel):
-    access_token: str
-    refresh_token: str
-    default_role: Roles
-
-
 class TokenData(BaseModel):
     user_id: int
-    user_agent: str
+    user_agent: Optional[str] = None
+    jti: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
+
+class CachedPrincipal(BaseModel):
+    "Authenticated user as kept in the principal cache, without the password"
+
+    id: int
+    role_id: Optional[int] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: str
+    phone_number: Optional[str] = None
+    email_verified: Optional[bool] = None
+    phone_verified: Optional[bool] = None
+    default_role: Roles
+    is_superuser: Optional[bool] = None
+    created_timestamp: Optional[datetime] = None
+    updated_timestamp: Optional[datetime] = None
 
 
 class RefreshTokenCreate(BaseModel):
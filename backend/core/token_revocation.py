@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+import logging
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from core import settings
+from core.cache import TTLCache
+from core.errors import ServiceUnavailable
+from core.metrics import REDIS_ERRORS
+
+REVOKED_TOKEN_KEY_PREFIX = "revoked_token:"
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationStore:
+    """
+    Revoked JWTs keyed by ``jti`` in Redis, shared by every worker.
+
+    Each entry lives only as long as the token would have, so the store never
+    grows past the set of unexpired revoked tokens. A small local cache in
+    front of Redis remembers revoked tokens until they expire and "not
+    revoked" answers for a few seconds.
+
+    If Redis is unreachable, lookups fail open: tokens this process already
+    knows to be revoked stay rejected, anything else is accepted until Redis
+    is back, since access tokens are short-lived. Revoking fails closed with
+    a 503 so a logout is never reported as done when it wasn't recorded.
+    """
+
+    def __init__(self, local_cache: TTLCache):
+        self.local_cache = local_cache
+
+    async def revoke(self, redis: Redis, jti: str, expires_at: datetime):
+        ttl = self._remaining_lifetime(expires_at)
+        try:
+            await redis.set(f"{REVOKED_TOKEN_KEY_PREFIX}{jti}", 1, ex=ttl)
+        except RedisError as e:
+            REDIS_ERRORS.labels(operation="token_revoke").inc()
+            logger.error(f"Could not revoke token {jti}: {e}")
+            raise ServiceUnavailable()
+        self.local_cache.set(jti, True, ttl=ttl)
+
+    async def is_revoked(self, redis: Redis, jti: str, expires_at: datetime) -> bool:
+        revoked = self.local_cache.get(jti)
+        if revoked is not None:
+            return revoked
+        try:
+            revoked = bool(await redis.exists(f"{REVOKED_TOKEN_KEY_PREFIX}{jti}"))
+        except RedisError as e:
+            REDIS_ERRORS.labels(operation="token_revocation_check").inc()
+            logger.warning(f"Revocation check skipped, Redis unavailable: {e}")
+            return False
+        if revoked:
+            self.local_cache.set(jti, True, ttl=self._remaining_lifetime(expires_at))
+        else:
+            self.local_cache.set(jti, False)
+        return revoked
+
+    @staticmethod
+    def _remaining_lifetime(expires_at: datetime) -> int:
+        remaining = expires_at - datetime.now(timezone.utc)
+        return max(int(remaining.total_seconds()), 1)
+
+
+token_revocation_store = TokenRevocationStore(
+    local_cache=TTLCache(
+        maxsize=settings.TOKEN_REVOCATION_CACHE_SIZE,
+        ttl=settings.TOKEN_REVOCATION_LOCAL_TTL,
+        name="token_revocation",
+    )
+)
@@ -1,7 +1,10 @@
-from datetime import datetime, timedelta
-import threading
+from datetime import datetime, timedelta, timezone
+import hashlib
+from typing import Callable
+import uuid
 
 from fastapi import Depends
+from redis.asyncio import Redis
 from sqlalchemy.orm import Session
 import jwt
 from jwt.exceptions import InvalidTokenError
@@ -10,36 +13,37 @@ from fastapi.security import OAuth2PasswordBearer
 from core import settings
 from core.db import get_db
 from core.errors import CredentialException, InvalidRequest
-from crud import CRUDAuthUser, get_crud_auth_user, crud_refresh_token
+from core.redis import get_redis
+from crud import CRUDAuthUser, CRUDRefreshToken, get_crud_auth_user
 from models.auth_user import AuthUser
+from schemas import Tokens
 from schemas.base import Roles
-from .schema import Tokens, TokenData, RefreshTokenCreate
+from .principal_cache import principal_cache
+from .schema import TokenData, RefreshTokenCreate
+from .token_revocation import token_revocation_store
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-BLACKLISTED_TOKEN = []
 
-lock = threading.Lock()
-
-
-async def deactivate_token(token, auth_id):
-    if token in BLACKLISTED_TOKEN:
+async def deactivate_token(
+    token, auth_id, crud_refresh_token: CRUDRefreshToken, redis: Redis
+):
+    token_data = decode_token(token)
+    if await token_revocation_store.is_revoked(
+        redis, token_data.jti, expires_at=token_data.expires_at
+    ):
         raise InvalidRequest("Already Logged Out")
-    verify_access_token(token)
-    with lock:
-        BLACKLISTED_TOKEN.append(token)
-        await crud_refresh_token.delete_by_auth_id(auth_id=auth_id)
-
-
-def is_token_blacklisted(token: str) -> bool:
-    with lock:
-        return token in BLACKLISTED_TOKEN
+    await token_revocation_store.revoke(
+        redis, token_data.jti, expires_at=token_data.expires_at
+    )
+    await crud_refresh_token.delete_by_auth_id(auth_id=auth_id)
+    await principal_cache.invalidate(redis, auth_id)
 
 
 def encode_jwt(payload: dict, expiry_time: timedelta):
     data_to_encode = payload.copy()
     expiration_time = datetime.utcnow() + expiry_time
-    data_to_encode.update({"exp": expiration_time})
+    data_to_encode.update({"exp": expiration_time, "jti": uuid.uuid4().hex})
     token = jwt.encode(data_to_encode, settings.JWT_SECRET_KEY, settings.ALGORITHM)
     return token
 
@@ -81,51 +85,93 @@ def generate_tokens(user_id, user_agent, default_role):
     )
 
 
-def verify_access_token(token):
-    if is_token_blacklisted(token):
-        raise InvalidRequest("User logged out")
+def decode_token(token) -> TokenData:
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, settings.ALGORITHM)
-        user_id = payload.get("user_id")
-        user_agent = payload.get("user_agent")
-        if not user_id:
-            CredentialException("invalid token")
-        token_data = TokenData(user_id=user_id, user_agent=user_agent)
     except InvalidTokenError:
         raise CredentialException("Invalid token")
+    user_id = payload.get("user_id")
+    if not user_id:
+        raise CredentialException("invalid token")
+    return TokenData(
+        user_id=user_id,
+        user_agent=payload.get("user_agent"),
+        # tokens issued before jti was added are keyed by their digest
+        jti=payload.get("jti") or hashlib.sha256(token.encode()).hexdigest(),
+        expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+    )
+
+
+async def verify_access_token(token, redis: Redis):
+    token_data = decode_token(token)
+    if await token_revocation_store.is_revoked(
+        redis, token_data.jti, expires_at=token_data.expires_at
+    ):
+        raise InvalidRequest("User logged out")
     return token_data
 
 
-def get_current_auth_user(
-    token=Depends(oauth2_scheme), db: Session = Depends(get_db)
+async def get_principal(
+    redis: Redis, user_id: int, load_auth_user: Callable[[], AuthUser]
+):
+    """Return the cached principal for ``user_id`` or load and cache it."""
+    version = await principal_cache.version(redis, user_id)
+    auth_user = await principal_cache.get(redis, user_id, version)
+    if auth_user:
+        return auth_user
+    auth_user = load_auth_user()
+    if auth_user:
+        await principal_cache.set(redis, auth_user, version)
+    return auth_user
+
+
+async def get_current_auth_user(
+    token=Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
 ) -> AuthUser:
     # TODO: Change this to accept only verified emails when i deploy completely with background worker
 
-    token = verify_access_token(token)
-    auth_user = db.query(AuthUser).filter(AuthUser.id == token.user_id).first()
+    token = await verify_access_token(token, redis)
+    auth_user = await get_principal(
+        redis,
+        token.user_id,
+        lambda: db.query(AuthUser).filter(AuthUser.id == token.user_id).first(),
+    )
     if not auth_user:
         raise CredentialException("User not found")
     return auth_user
 
 
-def get_current_unverified_auth_user(
-    token=Depends(oauth2_scheme), db: Session = Depends(get_db)
+async def get_current_unverified_auth_user(
+    token=Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
 ) -> AuthUser:
-    token = verify_access_token(token)
-    auth_user = db.query(AuthUser).filter(AuthUser.id == token.user_id).first()
+    token = await verify_access_token(token, redis)
+    auth_user = await get_principal(
+        redis,
+        token.user_id,
+        lambda: db.query(AuthUser).filter(AuthUser.id == token.user_id).first(),
+    )
     if not auth_user:
         raise CredentialException("User not found")
 
     return auth_user
 
 
-def get_current_verified_vendor(
+async def get_current_verified_vendor(
     token=Depends(oauth2_scheme),
     crud_auth_user: CRUDAuthUser = Depends(get_crud_auth_user),
+    redis: Redis = Depends(get_redis),
 ) -> AuthUser:
     # TODO: Change this to accept only verified emails and phone numbers  when i deploy completely with background worker
-    token = verify_access_token(token)
-    auth_user = crud_auth_user.get_or_raise_exception(id=token.user_id)
+    token = await verify_access_token(token, redis)
+    auth_user = await get_principal(
+        redis,
+        token.user_id,
+        lambda: crud_auth_user.get_or_raise_exception(id=token.user_id),
+    )
     if not (auth_user.default_role == Roles.VENDOR):
         raise InvalidRequest("Customer cannot perform this action")
     if not auth_user.role_id:
@@ -136,14 +182,19 @@ def get_current_verified_vendor(
     return auth_user
 
 
-def get_current_verified_customer(
+async def get_current_verified_customer(
     token=Depends(oauth2_scheme),
     crud_auth_user: CRUDAuthUser = Depends(get_crud_auth_user),
+    redis: Redis = Depends(get_redis),
 ) -> AuthUser:
     # TODO: Change this to accept only verified emails and phone numbers  when i deploy completely with background worker
 
-    token = verify_access_token(token)
-    auth_user = crud_auth_user.get_or_raise_exception(id=token.user_id)
+    token = await verify_access_token(token, redis)
+    auth_user = await get_principal(
+        redis,
+        token.user_id,
+        lambda: crud_auth_user.get_or_raise_exception(id=token.user_id),
+    )
 
     if not (auth_user.default_role == Roles.CUSTOMER):
         raise InvalidRequest("Vendor cannot perform this action")
@@ -162,11 +213,20 @@ def create_forget_password_token(auth_id, user_agent):
     )
 
 
-async def regenerate_tokens(token, user_agent, auth_id, default_role):
+async def regenerate_tokens(
+    token,
+    user_agent,
+    auth_id,
+    default_role,
+    crud_refresh_token: CRUDRefreshToken,
+    redis: Redis,
+):
 
     crud_refresh_token.check_if_refresh_token_exist(token)
 
-    token = await deactivate_token(token, auth_id=auth_id)
+    token = await deactivate_token(
+        token, auth_id=auth_id, crud_refresh_token=crud_refresh_token, redis=redis
+    )
 
     tokens = generate_tokens(
         user_agent=user_agent, user_id=auth_id, default_role=default_role
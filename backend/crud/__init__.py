@@ -6,4 +6,5 @@ from .customer import *
 from .vendor import *
 from .product import *
 from .cart import *
+from .cart_store import *
 from .order import *
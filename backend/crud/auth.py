@@ -32,10 +32,6 @@ class CRUDRefreshToken(CRUDBase[RefreshToken, RefreshTokenCreate, RefreshTokenCr
         return query
 
 
-crud_refresh_token = CRUDRefreshToken(db=get_db(), model=RefreshToken)
-crud_auth_user = CRUDAuthUser(db=get_db(), model=AuthUser)
-
-
 def get_crud_auth_user(db=Depends(get_db)):
     return CRUDAuthUser(db=db, model=AuthUser)
 
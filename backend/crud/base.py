@@ -1,5 +1,7 @@
 from datetime import datetime
-from typing import Any, Dict, Generic, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
@@ -106,8 +108,98 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         self._db.commit()
         return
 
+    async def create_many(
+        self, data_objs: List[Union[CreateSchemaType, dict]], commit: bool = True
+    ) -> List[ModelType]:
+        """Insert all rows in a single INSERT ... RETURNING statement.
+
+        Pass ``commit=False`` to write inside a transaction owned by the caller.
+        """
+        if not data_objs:
+            return []
+        rows = [
+            data_obj if isinstance(data_obj, dict) else data_obj.model_dump()
+            for data_obj in data_objs
+        ]
+        created = self._db.scalars(insert(self.model).returning(self.model), rows)
+        created = list(created.all())
+        if commit:
+            self._db.commit()
+        return created
+
     async def bulk_insert(self, data_objs: Union[CreateSchemaType]):
         data_list = [self.model(**data_obj.model_dump()) for data_obj in data_objs]
         datas = self._db.bulk_save_objects(data_list)
         self._db.commit()
         return datas
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType], db: AsyncSession):
+        self._db = db
+        self.model = model
+
+    async def get_or_raise_exception(self, id: int) -> ModelType:
+        query_result = await self.get(id)
+        if not query_result:
+            raise MissingResources
+        return query_result
+
+    async def get(self, id: int) -> Optional[ModelType]:
+        query_result = await self._db.scalar(
+            select(self.model).where(self.model.id == id)
+        )
+        return query_result if query_result else None
+
+    async def get_multi(self, skip: int = 0, limit: int = 20) -> list[ModelType]:
+        query_result = await self._db.scalars(
+            select(self.model).order_by(self.model.id).offset(skip).limit(limit)
+        )
+        return list(query_result.all())
+
+    async def get_by_auth_id(self, auth_id) -> Optional[ModelType]:
+        query_result = await self._db.scalar(
+            select(self.model).where(self.model.auth_id == auth_id)
+        )
+        return query_result if query_result else None
+
+    async def create(self, data_obj: Union[CreateSchemaType, dict]) -> ModelType:
+        data_dict = (
+            data_obj
+            if isinstance(data_obj, dict)
+            else data_obj.model_dump(exclude_none=True)
+        )
+        rsp_result = self.model(**data_dict)
+        self._db.add(rsp_result)
+        await self._db.commit()
+        await self._db.refresh(rsp_result)
+        return rsp_result
+
+    async def delete(self, id) -> bool:
+        result = await self._db.execute(
+            delete(self.model).where(self.model.id == id)
+        )
+        if not result.rowcount:
+            raise MissingResources("Item with ID doesn't exist")
+        await self._db.commit()
+        return True
+
+    async def update(
+        self, id, data_obj: Union[UpdateSchemaType, dict]
+    ) -> Dict[str, Any]:
+        data_dict = (
+            data_obj
+            if isinstance(data_obj, dict)
+            else data_obj.model_dump(exclude_unset=True)
+        )
+        data_dict["updated_timestamp"] = datetime.utcnow()
+        result = await self._db.execute(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(data_dict)
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            raise MissingResources("Item with ID doesn't exist")
+        await self._db.commit()
+        return data_dict
@@ -2,15 +2,90 @@ from datetime import datetime
 
 from typing import Dict, List, Optional
 from fastapi import Depends
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload
 
-from core.db import get_db
+from core.db import get_async_db, get_db
 from core.errors import InvalidRequest, MissingResources
-from crud.base import CRUDBase
+from crud.base import AsyncCRUDBase, CRUDBase
 from models import Cart, Product
 from schemas import CartCreate, CartUpdate
 
 
-class CRUDCart(CRUDBase[Cart, CartCreate, CartUpdate]):
+class CartQueryMixin:
+    """Cart summary statements shared by the sync and async cart CRUD classes."""
+
+    def _cart_items(self, customer_id: int):
+        # Fixed number of queries regardless of basket size: the cart rows, one
+        # select per eager-loaded relationship and the SQL totals
+        product_loader = selectinload(self.model.product)
+        return (
+            select(self.model)
+            .where(self.model.customer_id == customer_id)
+            .options(
+                product_loader.selectinload(Product.product_images),
+                product_loader.selectinload(Product.category),
+                selectinload(self.model.customer),
+            )
+        )
+
+    def _cart_totals(self, customer_id: int):
+        return (
+            select(
+                func.coalesce(func.sum(self.model.quantity * Product.price), 0),
+                func.coalesce(func.sum(self.model.quantity), 0),
+            )
+            .join(Product, Product.id == self.model.product_id)
+            .where(self.model.customer_id == customer_id)
+        )
+
+    @staticmethod
+    def _summary(cart_items: List[Cart], totals) -> Dict:
+        if not cart_items:
+            raise MissingResources("No items in cart")
+        total_amount, total_items_quantity = totals
+        return {
+            "total_items_quantity": total_items_quantity,
+            "total_amount": total_amount,
+            "cart_items": cart_items,
+        }
+
+
+class CRUDCart(CartQueryMixin, CRUDBase[Cart, CartCreate, CartUpdate]):
+
+    async def add_or_increment(
+        self, customer_id: int, product_id: int, quantity: int
+    ) -> Optional[Cart]:
+        """
+        Add a cart line, or add ``quantity`` to the existing line, in one statement.
+
+        Nothing is written, and ``None`` is returned, if the product doesn't
+        exist or the resulting quantity would exceed its stock.
+        """
+        stmt = insert(self.model).from_select(
+            ["customer_id", "product_id", "quantity"],
+            select(literal(customer_id), Product.id, literal(quantity)).where(
+                Product.id == product_id, Product.stock >= quantity
+            ),
+        )
+        new_quantity = self.model.quantity + stmt.excluded.quantity
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_cart_customer_id_product_id",
+            set_={
+                "quantity": new_quantity,
+                "updated_timestamp": datetime.utcnow(),
+            },
+            where=select(Product.stock)
+            .where(Product.id == stmt.excluded.product_id)
+            .scalar_subquery()
+            >= new_quantity,
+        ).returning(self.model)
+        cart = self._db.scalars(
+            stmt, execution_options={"populate_existing": True}
+        ).one_or_none()
+        self._db.commit()
+        return cart
 
     async def clear_cart(self, customer_id):
         cart_query = self._db.query(self.model).filter(
@@ -30,20 +105,33 @@ class CRUDCart(CRUDBase[Cart, CartCreate, CartUpdate]):
         self,
         customer_id: int,
     ) -> Dict:
-        cart_items = self.get_cart_items_by_customer_id(customer_id)
+        cart_items = self._db.scalars(self._cart_items(customer_id)).all()
         if not cart_items:
             raise MissingResources("No items in cart")
+        totals = self._db.execute(self._cart_totals(customer_id)).one()
+        return self._summary(cart_items, totals)
 
-        total_amount = sum(item.quantity * item.product.price for item in cart_items)
-        total_items_quantity = sum(item.quantity for item in cart_items)
-
-        summary = {
-            "total_items_quantity": total_items_quantity,
-            "total_amount": total_amount,
-            "cart_items": cart_items,
-        }
-
-        return summary
+    async def replace_customer_cart(self, customer_id: int, items: Dict[int, int]):
+        """Make the customer's cart rows match ``items`` in one transaction."""
+        try:
+            self._db.query(self.model).filter(
+                self.model.customer_id == customer_id
+            ).delete(synchronize_session=False)
+            await self.create_many(
+                [
+                    {
+                        "customer_id": customer_id,
+                        "product_id": product_id,
+                        "quantity": quantity,
+                    }
+                    for product_id, quantity in items.items()
+                ],
+                commit=False,
+            )
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
 
     def get_by_product_id_and_customer_id(
         self, product_id: int, customer_id: int
@@ -105,5 +193,18 @@ class CRUDCart(CRUDBase[Cart, CartCreate, CartUpdate]):
             raise InvalidRequest("Product doesn't exist in cart")
 
 
+class AsyncCRUDCart(CartQueryMixin, AsyncCRUDBase[Cart, CartCreate, CartUpdate]):
+    async def get_cart_summary(self, customer_id: int) -> Dict:
+        cart_items = (await self._db.scalars(self._cart_items(customer_id))).all()
+        if not cart_items:
+            raise MissingResources("No items in cart")
+        totals = (await self._db.execute(self._cart_totals(customer_id))).one()
+        return self._summary(cart_items, totals)
+
+
 def get_crud_cart(db=Depends(get_db)) -> CRUDCart:
     return CRUDCart(db=db, model=Cart)
+
+
+def get_async_crud_cart(db=Depends(get_async_db)) -> AsyncCRUDCart:
+    return AsyncCRUDCart(db=db, model=Cart)
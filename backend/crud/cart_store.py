@@ -0,0 +1,155 @@
+from typing import Dict, List, Optional
+
+from fastapi import Depends
+from redis.asyncio import Redis
+
+from core import settings
+from core.redis import get_redis
+from crud.cart import CRUDCart, get_crud_cart
+
+CART_KEY_PREFIX = "cart:"
+DIRTY_CARTS_KEY = "cart:dirty"
+# Marks a hash as loaded from Postgres, so an empty cart still has a key
+LOADED_FIELD = "__loaded__"
+
+# Only touch a line that is already in the cart
+_SET_EXISTING_QUANTITY = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('SADD', KEYS[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return 1
+end
+return 0
+"""
+
+# Add to a line, creating it if needed, unless the total would pass the stock
+_ADD_WITHIN_STOCK = """
+local quantity = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or 0) + ARGV[2]
+if quantity > tonumber(ARGV[3]) then
+    return -1
+end
+redis.call('HSET', KEYS[1], ARGV[1], quantity)
+redis.call('SADD', KEYS[2], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return quantity
+"""
+
+
+class RedisCartStore:
+    """
+    Carts kept as Redis hashes of ``product_id -> quantity``.
+
+    Every write marks the customer in ``cart:dirty``; the ``flush_dirty_carts``
+    cron job copies those carts to the ``cart`` table. A cart missing from
+    Redis is loaded from Postgres on first use.
+    """
+
+    def __init__(self, redis: Redis, crud_cart: CRUDCart):
+        self.redis = redis
+        self.crud_cart = crud_cart
+        self.ttl = settings.CART_REDIS_TTL
+        self._set_existing_quantity = redis.register_script(_SET_EXISTING_QUANTITY)
+        self._add_within_stock = redis.register_script(_ADD_WITHIN_STOCK)
+
+    @staticmethod
+    def _key(customer_id: int) -> str:
+        return f"{CART_KEY_PREFIX}{customer_id}"
+
+    async def _ensure_loaded(self, customer_id: int):
+        key = self._key(customer_id)
+        if await self.redis.exists(key):
+            return
+        cart_items = self.crud_cart.get_cart_items_by_customer_id(customer_id) or []
+        mapping = {str(item.product_id): item.quantity for item in cart_items}
+        mapping[LOADED_FIELD] = 1
+        async with self.redis.pipeline(transaction=True) as pipe:
+            # HSETNX keeps anything written by a concurrent request
+            for field, quantity in mapping.items():
+                pipe.hsetnx(key, field, quantity)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def get_items(self, customer_id: int) -> Dict[int, int]:
+        await self._ensure_loaded(customer_id)
+        cart = await self.redis.hgetall(self._key(customer_id))
+        return {
+            int(product_id): int(quantity)
+            for product_id, quantity in cart.items()
+            if product_id.decode() != LOADED_FIELD
+        }
+
+    async def get_quantity(self, customer_id: int, product_id: int) -> Optional[int]:
+        await self._ensure_loaded(customer_id)
+        quantity = await self.redis.hget(self._key(customer_id), str(product_id))
+        return int(quantity) if quantity is not None else None
+
+    async def add_item(
+        self, customer_id: int, product_id: int, quantity: int, stock: int
+    ) -> Optional[int]:
+        """
+        Add ``quantity`` to a line, creating it if needed, and return the new
+        total. Returns None, leaving the cart as it was, if the total would be
+        more than ``stock``.
+        """
+        await self._ensure_loaded(customer_id)
+        new_quantity = await self._add_within_stock(
+            keys=[self._key(customer_id), DIRTY_CARTS_KEY],
+            args=[str(product_id), quantity, stock, customer_id, self.ttl],
+        )
+        return new_quantity if new_quantity >= 0 else None
+
+    async def set_quantity(
+        self, customer_id: int, product_id: int, quantity: int
+    ) -> bool:
+        """Update a line's quantity; returns False if the product isn't in the cart."""
+        await self._ensure_loaded(customer_id)
+        updated = await self._set_existing_quantity(
+            keys=[self._key(customer_id), DIRTY_CARTS_KEY],
+            args=[str(product_id), quantity, customer_id, self.ttl],
+        )
+        return bool(updated)
+
+    async def remove_item(self, customer_id: int, product_id: int) -> bool:
+        await self._ensure_loaded(customer_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(self._key(customer_id), str(product_id))
+            pipe.sadd(DIRTY_CARTS_KEY, customer_id)
+            removed, *_ = await pipe.execute()
+        return bool(removed)
+
+    async def clear(self, customer_id: int):
+        key = self._key(customer_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, LOADED_FIELD, 1)
+            pipe.expire(key, self.ttl)
+            pipe.sadd(DIRTY_CARTS_KEY, customer_id)
+            await pipe.execute()
+
+    async def flush(self, customer_id: int):
+        """Write the customer's Redis cart to Postgres."""
+        await self.redis.srem(DIRTY_CARTS_KEY, customer_id)
+        key = self._key(customer_id)
+        # Nothing to persist if the cart expired; Postgres is already current
+        if not await self.redis.exists(key):
+            return
+        try:
+            await self.crud_cart.replace_customer_cart(
+                customer_id, await self.get_items(customer_id)
+            )
+        except Exception:
+            await self.redis.sadd(DIRTY_CARTS_KEY, customer_id)
+            raise
+
+    async def pop_dirty_customers(self, count: int) -> List[int]:
+        customer_ids = await self.redis.spop(DIRTY_CARTS_KEY, count)
+        return [int(customer_id) for customer_id in customer_ids or []]
+
+
+def get_cart_store(
+    crud_cart=Depends(get_crud_cart), redis=Depends(get_redis)
+) -> Optional[RedisCartStore]:
+    if settings.CART_BACKEND != "redis":
+        return None
+    return RedisCartStore(redis=redis, crud_cart=crud_cart)
@@ -1,7 +1,7 @@
 from fastapi import Depends
 
-from core.db import get_db
-from crud.base import CRUDBase
+from core.db import get_async_db, get_db
+from crud.base import AsyncCRUDBase, CRUDBase
 from models import Customer
 from schemas import CustomerCreate
 
@@ -10,5 +10,13 @@ class CRUDCustomer(CRUDBase[Customer, CustomerCreate, CustomerCreate]):
     pass
 
 
+class AsyncCRUDCustomer(AsyncCRUDBase[Customer, CustomerCreate, CustomerCreate]):
+    pass
+
+
 def get_crud_customer(db=Depends(get_db)):
     return CRUDCustomer(db=db, model=Customer)
+
+
+def get_async_crud_customer(db=Depends(get_async_db)) -> AsyncCRUDCustomer:
+    return AsyncCRUDCustomer(db=db, model=Customer)
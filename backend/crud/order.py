@@ -1,17 +1,30 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from fastapi import Depends
 import sqlalchemy
 import sqlalchemy.orm
+from sqlalchemy.dialects.postgresql import insert
 
 from core.db import get_db
+from core.errors import InvalidRequest, MissingResources
 from crud.base import CRUDBase
-from models import Order, OrderItem, ShippingDetails, PaymentDetails
-from schemas.base import StatusEnum
+from crud.product import CRUDProduct
+from core import settings
+from models import (
+    Order,
+    OrderItem,
+    PaymentDetails,
+    PaymentEvent,
+    Product,
+    ShippingDetails,
+    Vendor,
+)
+from schemas.base import OrderStatusEnum, StatusEnum
 from schemas import (
     OrderCreate,
     PaymentDetailsCreate,
+    PaymentEventCreate,
     OrderItemsCreate,
     ShippingDetailsCreate,
 )
@@ -32,6 +45,215 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderCreate]):
         )
         return query
 
+    async def create_order_with_items(
+        self,
+        order_obj: OrderCreate,
+        order_items: List[dict],
+        shipping_details: ShippingDetailsCreate,
+        payment_details: Optional[PaymentDetailsCreate] = None,
+    ) -> Order:
+        """Reserve stock and write the order, its items, shipping details and,
+        when given, its payment row in one transaction. The stock decrement is
+        conditional on enough stock being left, so concurrent checkouts for the
+        same products can't oversell."""
+        try:
+            await CRUDProduct(db=self._db, model=Product).decrement_stock(
+                [(item["product_id"], item["quantity"]) for item in order_items],
+                commit=False,
+            )
+
+            order = self.model(**order_obj.model_dump(exclude_none=True))
+            self._db.add(order)
+            self._db.flush()
+
+            await CRUDOrderItem(db=self._db, model=OrderItem).create_many(
+                [{**item, "order_id": order.id} for item in order_items],
+                commit=False,
+            )
+            shipping_details.order_id = order.id
+            self._db.add(ShippingDetails(**shipping_details.model_dump()))
+            if payment_details:
+                payment_details.order_id = order.id
+                payment_details.amount = order.total_amount
+                self._db.add(PaymentDetails(**payment_details.model_dump()))
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+        self._db.refresh(order)
+        return order
+
+    def get_with_vendor(
+        self, order_id: int
+    ) -> Tuple[Optional[Order], Optional[Vendor]]:
+        """The order and the vendor of its first item, in one query."""
+        first_item = (
+            sqlalchemy.select(OrderItem.vendor_id)
+            .where(OrderItem.order_id == order_id)
+            .order_by(OrderItem.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        row = (
+            self._db.query(self.model, Vendor)
+            .outerjoin(Vendor, Vendor.id == first_item)
+            .filter(self.model.id == order_id)
+            .first()
+        )
+        return (row[0], row[1]) if row else (None, None)
+
+    async def _release_orders(self, order_ids: List[int]):
+        """Mark ``order_ids`` cancelled and hand their reserved stock back. Runs
+        inside the caller's transaction."""
+        order_items = (
+            self._db.query(OrderItem.product_id, OrderItem.quantity)
+            .filter(OrderItem.order_id.in_(order_ids))
+            .all()
+        )
+        await CRUDProduct(db=self._db, model=Product).increment_stock(
+            order_items, commit=False
+        )
+        self._db.query(self.model).filter(self.model.id.in_(order_ids)).update(
+            {
+                self.model.status: OrderStatusEnum.CANCELLED,
+                self.model.updated_timestamp: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+
+    async def cancel_order(self, order_id: int) -> bool:
+        """Cancel an unpaid processing order and hand its reserved stock back.
+        The row is kept so a payment that still lands later can find it."""
+        has_payment = sqlalchemy.exists().where(
+            PaymentDetails.order_id == self.model.id
+        )
+        try:
+            cancellable = self._db.scalar(
+                sqlalchemy.select(self.model.id)
+                .where(self.model.id == order_id)
+                .where(self.model.status == OrderStatusEnum.PROCESSING)
+                .where(~has_payment)
+                .with_for_update()
+            )
+            if cancellable is None:
+                self._db.rollback()
+                return False
+            await self._release_orders([order_id])
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+        return True
+
+    async def cancel_expired_unpaid_orders(self, older_than: timedelta) -> List[int]:
+        """Cancel processing orders still without a payment row after
+        ``older_than`` and hand their reserved stock back, in one transaction.
+        Orders another transaction is working on are left for the next run."""
+        has_payment = sqlalchemy.exists().where(
+            PaymentDetails.order_id == self.model.id
+        )
+        try:
+            expired_order_ids = self._db.scalars(
+                sqlalchemy.select(self.model.id)
+                .where(self.model.status == OrderStatusEnum.PROCESSING)
+                .where(self.model.order_date < sqlalchemy.func.now() - older_than)
+                .where(~has_payment)
+                .order_by(self.model.id)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not expired_order_ids:
+                self._db.rollback()
+                return []
+            await self._release_orders(list(expired_order_ids))
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+        return list(expired_order_ids)
+
+    async def record_payment(
+        self, payment_details: PaymentDetailsCreate
+    ) -> Tuple[str, str]:
+        """
+        Write a successful payment for its order while holding the order's lock,
+        so the expiry job can't cancel it halfway.
+
+        A payment can land after the order was cancelled. Its stock is reserved
+        again if there is enough left; otherwise the order and its items are
+        flagged for a refund. Returns the order status before and after.
+        """
+        try:
+            order = (
+                self._db.query(self.model)
+                .filter(self.model.id == payment_details.order_id)
+                .with_for_update()
+                .one_or_none()
+            )
+            if order is None:
+                raise MissingResources("Order doesn't exist")
+            previous_status = order.status
+            if previous_status == OrderStatusEnum.CANCELLED:
+                order.status = await self._reserve_cancelled_order(order.id)
+                order.updated_timestamp = datetime.utcnow()
+            self._db.add(PaymentDetails(**payment_details.model_dump()))
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+        return previous_status, order.status
+
+    async def _reserve_cancelled_order(self, order_id: int) -> str:
+        order_items = (
+            self._db.query(OrderItem.product_id, OrderItem.quantity)
+            .filter(OrderItem.order_id == order_id)
+            .all()
+        )
+        savepoint = self._db.begin_nested()
+        try:
+            await CRUDProduct(db=self._db, model=Product).decrement_stock(
+                order_items, commit=False
+            )
+        except InvalidRequest:
+            savepoint.rollback()
+            self._db.query(OrderItem).filter(OrderItem.order_id == order_id).update(
+                {OrderItem.status: OrderStatusEnum.REFUNDED},
+                synchronize_session=False,
+            )
+            return OrderStatusEnum.REFUND_DUE
+        savepoint.commit()
+        return OrderStatusEnum.PROCESSING
+
+    async def mark_completed_orders_as_shipped(
+        self, order_id: Optional[int] = None
+    ) -> List[int]:
+        """Flip processing orders to shipped once none of their items is still
+        processing or refunded. Scoped to one order when ``order_id`` is given,
+        otherwise a single set-based pass over the processing orders."""
+        has_items = sqlalchemy.exists().where(OrderItem.order_id == self.model.id)
+        has_open_items = (
+            sqlalchemy.exists()
+            .where(OrderItem.order_id == self.model.id)
+            .where(
+                OrderItem.status.in_(
+                    [OrderStatusEnum.PROCESSING, OrderStatusEnum.REFUNDED]
+                )
+            )
+        )
+        query = (
+            sqlalchemy.update(self.model)
+            .where(self.model.status == OrderStatusEnum.PROCESSING)
+            .where(has_items)
+            .where(~has_open_items)
+            .values(status=OrderStatusEnum.SHIPPED, updated_timestamp=datetime.utcnow())
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+        if order_id is not None:
+            query = query.where(self.model.id == order_id)
+        shipped_order_ids = self._db.scalars(query).all()
+        self._db.commit()
+        return list(shipped_order_ids)
+
 
 class CRUDOrderItem(CRUDBase[OrderItem, OrderItemsCreate, OrderItemsCreate]):
 
@@ -93,7 +315,58 @@ class CRUDPaymentDetails(
         return query if query else None
 
 
-crud_order = CRUDOrder(db=get_db(), model=Order)
+class CRUDPaymentEvent(
+    CRUDBase[PaymentEvent, PaymentEventCreate, PaymentEventCreate]
+):
+
+    def claim(self, payment_ref: str, source: str) -> bool:
+        """
+        Take ownership of ``payment_ref`` so only one caller processes it.
+
+        Returns False if the reference was already processed, or another
+        caller holds a claim younger than ``PAYMENT_CLAIM_TIMEOUT``.
+        """
+        stmt = (
+            insert(self.model)
+            .values(payment_ref=payment_ref, source=source, status="processing")
+            .on_conflict_do_nothing(index_elements=[self.model.payment_ref])
+            .returning(self.model.id)
+        )
+        claimed = self._db.execute(stmt).scalar_one_or_none()
+        if claimed is None:
+            # The owner may have died mid-request; take over its claim once stale
+            stale_before = sqlalchemy.func.now() - timedelta(
+                seconds=settings.PAYMENT_CLAIM_TIMEOUT
+            )
+            claimed = self._db.execute(
+                sqlalchemy.update(self.model)
+                .where(
+                    self.model.payment_ref == payment_ref,
+                    self.model.status == "processing",
+                    self.model.claimed_at < stale_before,
+                )
+                .values(source=source, claimed_at=sqlalchemy.func.now())
+                .returning(self.model.id)
+            ).scalar_one_or_none()
+        self._db.commit()
+        return claimed is not None
+
+    def mark_processed(self, payment_ref: str):
+        self._db.execute(
+            sqlalchemy.update(self.model)
+            .where(self.model.payment_ref == payment_ref)
+            .values(status="processed", processed_at=sqlalchemy.func.now())
+        )
+        self._db.commit()
+
+    def release(self, payment_ref: str):
+        """Drop an unfinished claim so the reference can be retried."""
+        self._db.rollback()
+        self._db.query(self.model).filter(
+            self.model.payment_ref == payment_ref,
+            self.model.status == "processing",
+        ).delete(synchronize_session=False)
+        self._db.commit()
 
 
 def get_crud_order(db=Depends(get_db)) -> CRUDOrder:
@@ -110,3 +383,7 @@ def get_crud_shipping_details(db=Depends(get_db)) -> CRUDShippingDetails:
 
 def get_crud_payment_details(db=Depends(get_db)) -> CRUDPaymentDetails:
     return CRUDPaymentDetails(db=db, model=PaymentDetails)
+
+
+def get_crud_payment_event(db=Depends(get_db)) -> CRUDPaymentEvent:
+    return CRUDPaymentEvent(db=db, model=PaymentEvent)
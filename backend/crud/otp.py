@@ -57,8 +57,5 @@ class CRUDOtp(CRUDBase[OTP, OTPCreate, OTPCreate]):
         return otp_query
 
 
-crud_otp = CRUDOtp(db=get_db(), model=OTP)
-
-
 def get_crud_otp(db=Depends(get_db)):
     return CRUDOtp(db=db, model=OTP)
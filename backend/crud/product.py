@@ -1,14 +1,18 @@
-from typing import List, Union
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 from fastapi import Depends
-from sqlalchemy import desc
+from sqlalchemy import Integer, column, desc, func, or_, tuple_, values
 
 import sqlalchemy
 import sqlalchemy.orm
 
-from core.db import get_db
-from core.errors import MissingResources
-from crud.base import CRUDBase
+from core.db import get_async_db, get_db
+from core.errors import InvalidRequest, MissingResources
+from crud.base import AsyncCRUDBase, CRUDBase
 from models import Product, ProductCategory, ProductImage, ProductReview
+from models.product import product_search_document
+from schemas.base import ProductSortEnum
 from schemas import (
     ProductCreate,
     ProductUpdate,
@@ -19,50 +23,154 @@ from schemas import (
 )
 
 
-class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
+class ProductQueryMixin:
+    """Statement builders shared by the sync and async product CRUD classes.
 
-    def get_all_products_public(
-        self, search: str | None, skip=0, limit=10
-    ) -> Union[List[Product], None]:
+    They only chain ``filter``/``join``/``order_by``, so they accept both a
+    legacy ``Query`` and a 2.0 ``select()``.
+    """
 
-        product_query = (
-            self._db.query(self.model)
-            .filter(self.model.product_name.ilike(f"%{search}%"))
-            .filter(self.model.product_status == True)
-            .order_by(desc(self.model.created_timestamp))
+    def _public_products(
+        self,
+        search: str | None,
+        skip=0,
+        limit=10,
+        after: Optional[Tuple[datetime, int]] = None,
+        sort: ProductSortEnum = ProductSortEnum.NEWEST,
+        min_rating: Optional[float] = None,
+        category_ids: Sequence[int] = (),
+    ):
+        product_query = self._search(
+            sqlalchemy.select(self.model).filter(self.model.product_status == True),
+            search,
+            category_ids,
+        )
+        if min_rating is not None:
+            product_query = product_query.filter(self.model.avg_rating >= min_rating)
+        return self._with_details(
+            self._order(product_query, search, sort, after).offset(skip).limit(limit)
+        )
+
+    def _by_price(
+        self, skip: int = 0, limit: int = 20, after: Optional[Tuple[int, int]] = None
+    ):
+        product_query = sqlalchemy.select(self.model)
+        if after:
+            product_query = product_query.filter(
+                tuple_(self.model.price, self.model.id) < tuple_(*after)
+            )
+        return self._with_details(
+            product_query.order_by(desc(self.model.price), desc(self.model.id))
             .offset(skip)
             .limit(limit)
-            .options(sqlalchemy.orm.joinedload(self.model.reviews))
-        ).all()
+        )
+
+    def _with_details(self, product_query):
+        return product_query.options(
+            sqlalchemy.orm.selectinload(self.model.product_images),
+            sqlalchemy.orm.selectinload(self.model.category),
+        )
+
+    @staticmethod
+    def _matching_category_ids(search: str):
+        return sqlalchemy.select(ProductCategory.id).where(
+            ProductCategory.category_name.ilike(f"%{search}%")
+        )
+
+    def _search(
+        self, product_query, search: str | None, category_ids: Sequence[int] = ()
+    ):
+        # Matches on name, short description or one of ``category_ids``, the
+        # categories whose name matches (see _matching_category_ids). Callers
+        # resolve those first: joining product_category and filtering on its
+        # name, or comparing against a subquery the planner can't size, makes
+        # Postgres check every product row. With literal ids every branch is
+        # a products predicate with its own index (GIN on
+        # product_search_document, pg_trgm GIN on the two text columns and
+        # ix_products_product_category_id), so they combine in a BitmapOr.
+        if not search:
+            return product_query
+        pattern = f"%{search}%"
+        predicates = [
+            self._search_document().op("@@")(self._search_query(search)),
+            self.model.product_name.ilike(pattern),
+            self.model.short_description.ilike(pattern),
+        ]
+        if category_ids:
+            predicates.append(self.model.product_category_id.in_(category_ids))
+        return product_query.filter(or_(*predicates))
+
+    def _order(
+        self,
+        product_query,
+        search: str | None,
+        sort: ProductSortEnum,
+        after: Optional[Tuple[datetime, int]],
+    ):
+        if search and sort == ProductSortEnum.RELEVANCE:
+            rank = func.ts_rank(
+                self._search_document(), self._search_query(search)
+            ) + func.similarity(self.model.product_name, search)
+            return product_query.order_by(desc(rank), desc(self.model.id))
+        if sort == ProductSortEnum.RATING:
+            return product_query.order_by(
+                desc(self.model.avg_rating).nulls_last(), desc(self.model.id)
+            )
+        return self._newest_first(product_query, after)
+
+    def _search_document(self):
+        return product_search_document(
+            self.model.product_name, self.model.short_description
+        )
+
+    @staticmethod
+    def _search_query(search: str):
+        return func.plainto_tsquery(sqlalchemy.literal_column("'simple'"), search)
+
+    def _newest_first(self, product_query, after: Optional[Tuple[datetime, int]]):
+        # Keyset pagination: (created_timestamp, id) is unique and indexed, so a
+        # page starting after a cursor costs the same as the first page.
+        if after:
+            product_query = product_query.filter(
+                tuple_(self.model.created_timestamp, self.model.id) < tuple_(*after)
+            )
+        return product_query.order_by(
+            desc(self.model.created_timestamp), desc(self.model.id)
+        )
 
-        return product_query if product_query else None
+
+class CRUDProduct(ProductQueryMixin, CRUDBase[Product, ProductCreate, ProductUpdate]):
 
     def get_products_for_vendor(
-        self, vendor_id: int, search: str | None, skip=0, limit=10
+        self,
+        vendor_id: int,
+        search: str | None,
+        skip=0,
+        limit=10,
+        after: Optional[Tuple[datetime, int]] = None,
+        sort: ProductSortEnum = ProductSortEnum.NEWEST,
     ) -> Union[List[Product], None]:
 
-        product_query = (
+        category_ids = (
+            self._db.scalars(self._matching_category_ids(search)).all()
+            if search
+            else ()
+        )
+        product_query = self._search(
             self._db.query(self.model)
             .filter(self.model.vendor_id == vendor_id)
-            .filter(self.model.product_name.ilike(f"%{search}%"))
-            .filter(self.model.product_status == True)
-            .order_by(desc(self.model.created_timestamp))
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .filter(self.model.product_status == True),
+            search,
+            category_ids,
         )
-
-        return product_query if product_query else None
-
-    def sort_product_by_price(self, skip: int = 0, limit: int = 20) -> List[Product]:
         product_query = (
-            self._db.query(self.model)
-            .order_by(desc(self.model.price))
+            self._order(product_query, search, sort, after)
             .offset(skip)
             .limit(limit)
             .all()
         )
-        return product_query
+
+        return product_query if product_query else None
 
     def get_active_products(self, id: int) -> Product:
         query_result = self._db.query(self.model).filter(self.model.id == id).first()
@@ -81,11 +189,273 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
 
         return query_result if query_result else None
 
+    async def decrement_stock(
+        self, items: Iterable[Tuple[int, int]], commit: bool = True
+    ) -> List[int]:
+        """Take ``(product_id, quantity)`` pairs off stock in one
+        ``UPDATE ... FROM (VALUES ...)`` statement.
+
+        Either every product is decremented or none is: if any active product
+        lacks stock, InvalidRequest names the products that would go negative
+        and any that are no longer available.
+        With ``commit=False`` the caller owns the transaction and rolls it back.
+        """
+        quantities = self._sum_quantities(items)
+        if not quantities:
+            return []
+        self._lock_products(quantities)
+        stock_change = self._stock_change_values(quantities)
+        updated_ids = self._db.scalars(
+            sqlalchemy.update(self.model)
+            .where(self.model.id == stock_change.c.product_id)
+            .where(self.model.product_status == True)
+            .where(self.model.stock >= stock_change.c.quantity)
+            .values(stock=self.model.stock - stock_change.c.quantity)
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        if len(updated_ids) != len(quantities):
+            short_ids = set(quantities) - set(updated_ids)
+            short_products = (
+                self._db.query(
+                    self.model.id,
+                    self.model.product_name,
+                    self.model.stock,
+                    self.model.product_status,
+                )
+                .filter(self.model.id.in_(short_ids))
+                .all()
+            )
+            if commit:
+                self._db.rollback()
+            if not short_products:
+                raise InvalidRequest("Product no longer available")
+            # Only an active product can be short on stock; anything else was
+            # deactivated since it went in the cart
+            messages = [
+                f"{name} has: {stock} stocks left"
+                if active and stock < quantities[product_id]
+                else f"{name} is no longer available"
+                for product_id, name, stock, active in short_products
+            ]
+            raise InvalidRequest(", ".join(messages))
+        if commit:
+            self._db.commit()
+        return list(updated_ids)
+
+    async def increment_stock(
+        self, items: Iterable[Tuple[int, int]], commit: bool = True
+    ) -> None:
+        """Put ``(product_id, quantity)`` pairs back on stock in one statement."""
+        quantities = self._sum_quantities(items)
+        if not quantities:
+            return
+        self._lock_products(quantities)
+        stock_change = self._stock_change_values(quantities)
+        self._db.execute(
+            sqlalchemy.update(self.model)
+            .where(self.model.id == stock_change.c.product_id)
+            .values(stock=self.model.stock + stock_change.c.quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if commit:
+            self._db.commit()
+
+    def apply_review_rating(
+        self, product_id: int, rating_delta: float, count_delta: int = 0
+    ):
+        """Adjust a product's review aggregates in place. Runs inside the caller's
+        transaction; the arithmetic happens in SQL so concurrent reviews can't
+        lose updates."""
+        new_sum = self.model.rating_sum + rating_delta
+        new_count = self.model.rating_count + count_delta
+        self._db.query(self.model).filter(self.model.id == product_id).update(
+            {
+                self.model.rating_sum: new_sum,
+                self.model.rating_count: new_count,
+                self.model.avg_rating: new_sum / func.nullif(new_count, 0),
+            },
+            synchronize_session=False,
+        )
+
+    async def backfill_rating_aggregates(self) -> int:
+        """Recompute every product's review aggregates from product_reviews."""
+        review_totals = (
+            sqlalchemy.select(
+                ProductReview.product_id,
+                func.sum(ProductReview.rating).label("rating_sum"),
+                func.count(ProductReview.id).label("rating_count"),
+            )
+            .group_by(ProductReview.product_id)
+            .subquery()
+        )
+        rating_sum = func.coalesce(
+            sqlalchemy.select(review_totals.c.rating_sum)
+            .where(review_totals.c.product_id == self.model.id)
+            .scalar_subquery(),
+            0,
+        )
+        rating_count = func.coalesce(
+            sqlalchemy.select(review_totals.c.rating_count)
+            .where(review_totals.c.product_id == self.model.id)
+            .scalar_subquery(),
+            0,
+        )
+        result = self._db.execute(
+            sqlalchemy.update(self.model)
+            .values(
+                rating_sum=rating_sum,
+                rating_count=rating_count,
+                avg_rating=rating_sum / func.nullif(rating_count, 0),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self._db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def _sum_quantities(items: Iterable[Tuple[int, int]]) -> Counter:
+        quantities = Counter()
+        for product_id, quantity in items:
+            quantities[product_id] += quantity
+        return quantities
+
+    def _lock_products(self, quantities: Counter):
+        # Lock rows in id order so concurrent multi-product orders can't deadlock
+        self._db.execute(
+            sqlalchemy.select(self.model.id)
+            .where(self.model.id.in_(quantities))
+            .order_by(self.model.id)
+            .with_for_update()
+        )
+
+    @staticmethod
+    def _stock_change_values(quantities: Counter):
+        return values(
+            column("product_id", Integer),
+            column("quantity", Integer),
+            name="stock_change",
+        ).data(sorted(quantities.items()))
+
+
+class AsyncCRUDProduct(
+    ProductQueryMixin, AsyncCRUDBase[Product, ProductCreate, ProductUpdate]
+):
+    """Catalog reads on the async session, so they don't block the event loop.
+
+    Relationships the responses serialize are eager loaded, since lazy loads
+    can't run outside the greenlet on an ``AsyncSession``.
+    """
+
+    async def get_all_products_public(
+        self,
+        search: str | None,
+        skip=0,
+        limit=10,
+        after: Optional[Tuple[datetime, int]] = None,
+        sort: ProductSortEnum = ProductSortEnum.NEWEST,
+        min_rating: Optional[float] = None,
+    ) -> Union[List[Product], None]:
+        category_ids = (
+            (await self._db.scalars(self._matching_category_ids(search))).all()
+            if search
+            else ()
+        )
+        products = await self._db.scalars(
+            self._public_products(
+                search, skip, limit, after, sort, min_rating, category_ids
+            )
+        )
+        products = list(products.all())
+        return products if products else None
+
+    async def sort_product_by_price(
+        self, skip: int = 0, limit: int = 20, after: Optional[Tuple[int, int]] = None
+    ) -> List[Product]:
+        products = await self._db.scalars(self._by_price(skip, limit, after))
+        return list(products.all())
+
+    async def get_active_product(self, id: int) -> Product:
+        product = await self._db.scalar(
+            self._with_details(sqlalchemy.select(self.model)).where(
+                self.model.id == id, self.model.product_status == True
+            )
+        )
+        if not product:
+            raise MissingResources
+        return product
+
+    async def get_products_by_ids(self, ids: Iterable[int]) -> List[Product]:
+        products = await self._db.scalars(
+            self._with_details(sqlalchemy.select(self.model)).where(
+                self.model.id.in_(list(ids))
+            )
+        )
+        return list(products.all())
+
 
 class CRUDProductReview(
     CRUDBase[ProductReview, ProductReviewCreate, ProductReviewUpdate]
 ):
-    pass
+    async def create_review(self, data_obj: ProductReviewCreate) -> ProductReview:
+        """Insert a review and fold its rating into the product aggregates in
+        the same transaction."""
+        try:
+            review = self.model(**data_obj.model_dump(exclude_none=True))
+            self._db.add(review)
+            CRUDProduct(db=self._db, model=Product).apply_review_rating(
+                product_id=data_obj.product_id,
+                rating_delta=data_obj.rating,
+                count_delta=1,
+            )
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+        self._db.refresh(review)
+        return review
+
+    async def update_review(
+        self, review: ProductReview, data_obj: ProductReviewUpdate
+    ) -> dict:
+        data_dict = data_obj.model_dump(exclude_unset=True)
+        data_dict["updated_timestamp"] = datetime.utcnow()
+        try:
+            # Re-read the rating under a row lock: ``review`` may be stale, and
+            # two concurrent edits must each apply their delta to the other's
+            # result or the aggregate drifts
+            old_rating = self._db.scalar(
+                sqlalchemy.select(self.model.rating)
+                .where(self.model.id == review.id)
+                .with_for_update()
+            )
+            if data_obj.rating is not None and data_obj.rating != old_rating:
+                CRUDProduct(db=self._db, model=Product).apply_review_rating(
+                    product_id=review.product_id,
+                    rating_delta=data_obj.rating - old_rating,
+                )
+            self._db.query(self.model).filter(self.model.id == review.id).update(
+                data_dict, synchronize_session=False
+            )
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+        return data_dict
+
+    def get_reviews_for_product(
+        self, product_id: int, skip: int = 0, limit: int = 20
+    ) -> List[ProductReview]:
+        query_result = (
+            self._db.query(self.model)
+            .filter(self.model.product_id == product_id)
+            .order_by(desc(self.model.created_timestamp), desc(self.model.id))
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return query_result
 
 
 class CRUDProductImage(CRUDBase[ProductImage, ProductImageCreate, ProductImageCreate]):
@@ -104,8 +474,14 @@ class CRUDProductCategory(
         return query if query else None
 
 
-crud_product_image = CRUDProductImage(db=get_db(), model=ProductImage)
-crud_product_category = CRUDProductCategory(db=get_db(), model=ProductCategory)
+class AsyncCRUDProductCategory(
+    AsyncCRUDBase[ProductCategory, ProductCategoryCreate, ProductCategoryCreate]
+):
+    async def get_all(self) -> List[ProductCategory]:
+        categories = await self._db.scalars(
+            sqlalchemy.select(self.model).order_by(self.model.category_name)
+        )
+        return list(categories.all())
 
 
 def get_crud_product(db=Depends(get_db)) -> CRUDProduct:
@@ -122,3 +498,13 @@ def get_crud_product_category(db=Depends(get_db)) -> CRUDProductCategory:
 
 def get_crud_product_review(db=Depends(get_db)) -> CRUDProductReview:
     return CRUDProductReview(db=db, model=ProductReview)
+
+
+def get_async_crud_product(db=Depends(get_async_db)) -> AsyncCRUDProduct:
+    return AsyncCRUDProduct(db=db, model=Product)
+
+
+def get_async_crud_product_category(
+    db=Depends(get_async_db),
+) -> AsyncCRUDProductCategory:
+    return AsyncCRUDProductCategory(db=db, model=ProductCategory)
@@ -1,19 +1,57 @@
+import asyncio
+
+from arq import ArqRedis
 from fastapi import FastAPI
+from redis.asyncio import Redis
 
-from core.middleware import start_up_db
-from core.db import Base, engine
+from core.middleware import (
+    QueryCountMiddleware,
+    RequestMetricsMiddleware,
+    install_query_instrumentation,
+    start_up_db,
+)
+from core.db import Base, async_engine, engine
+from core.metrics import PASSWORD_HASH_QUEUE_DEPTH, register_pool_metrics
+from core.http_clients import (
+    close_http_clients,
+    get_paystack_http_client,
+    get_postmark_http_client,
+)
+from core.redis import create_redis_pool
 import models  # ensure models are imported so metadata is populated
 from api.endpoints import router
+from utils.password_utils import password_hasher
 
 
 app = FastAPI()
+app.add_middleware(QueryCountMiddleware)
+install_query_instrumentation(engine)
+install_query_instrumentation(async_engine.sync_engine)
+app.add_middleware(RequestMetricsMiddleware)
+register_pool_metrics("sync", engine)
+register_pool_metrics("async", async_engine.sync_engine)
+PASSWORD_HASH_QUEUE_DEPTH.set_function(lambda: password_hasher.queue_depth)
 
 
 @app.on_event("startup")
-def start_up():
-    start_up_db()
+async def start_up():
+    await start_up_db()
     # Create all tables once at startup (no Alembic usage).
-    Base.metadata.create_all(bind=engine)
+    await asyncio.to_thread(Base.metadata.create_all, bind=engine)
+    # Redis connections are bound to this event loop, so they're made here
+    app.state.redis_pool = create_redis_pool()
+    app.state.redis = Redis(connection_pool=app.state.redis_pool)
+    app.state.queue_connection = ArqRedis(connection_pool=app.state.redis_pool)
+    get_paystack_http_client()
+    get_postmark_http_client()
+
+
+@app.on_event("shutdown")
+async def shut_down():
+    password_hasher.shutdown()
+    await app.state.redis_pool.disconnect()
+    await async_engine.dispose()
+    await close_http_clients()
 
 
 app.include_router(router)
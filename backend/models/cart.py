@@ -7,6 +7,7 @@ from sqlalchemy import (
     ForeignKey,
     Integer,
     TIMESTAMP,
+    UniqueConstraint,
     text,
 )
 from sqlalchemy.orm import relationship
@@ -16,6 +17,12 @@ from models.product import Product
 
 class Cart(Base):
     __tablename__ = "cart"
+    __table_args__ = (
+        UniqueConstraint(
+            "customer_id", "product_id", name="uq_cart_customer_id_product_id"
+        ),
+    )
+
     id = Column(Integer, primary_key=True, nullable=False)
     product_id = Column(
         ForeignKey(column="products.id", ondelete="CASCADE", onupdate="CASCADE"),
@@ -5,6 +5,7 @@ from core.db import Base
 from sqlalchemy import (
     Column,
     ForeignKey,
+    Index,
     Integer,
     String,
     TIMESTAMP,
@@ -16,6 +17,13 @@ from .customer import Customer
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index(
+            "ix_orders_processing",
+            "id",
+            postgresql_where=text("status = 'processing'"),
+        ),
+    )
 
     STATUS: ClassVar[str] = "status"
 
@@ -42,6 +50,8 @@ class Order(Base):
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (Index("ix_order_items_order_id_status", "order_id", "status"),)
+
     id = Column(Integer, primary_key=True, nullable=False)
 
     order_id = Column(
@@ -88,6 +98,22 @@ class PaymentDetails(Base):
     order = relationship("Order", back_populates="payment_details")
 
 
+class PaymentEvent(Base):
+    """Idempotency key per Paystack reference.
+
+    Whichever of verify-payment or the webhook inserts the row first owns the
+    reference; everyone else backs off until it is released or goes stale.
+    """
+
+    __tablename__ = "payment_events"
+    id = Column(Integer, primary_key=True, nullable=False)
+    payment_ref = Column(String, nullable=False, unique=True)
+    source = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="processing")
+    claimed_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
+    processed_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+
 class ShippingDetails(Base):
     __tablename__ = "shipping_details"
     id = Column(Integer, primary_key=True, nullable=False)
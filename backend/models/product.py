@@ -1,16 +1,21 @@
 from __future__ import annotations
 from typing import ClassVar
 
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, synonym
 from sqlalchemy import (
+    DDL,
     TEXT,
     Boolean,
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     TIMESTAMP,
+    event,
+    func,
+    literal_column,
     text,
     Float,
 )
@@ -20,6 +25,17 @@ from core.db import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_created_timestamp_id", "created_timestamp", "id"),
+        Index(
+            "ix_products_vendor_id_created_timestamp_id",
+            "vendor_id",
+            "created_timestamp",
+            "id",
+        ),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_product_category_id", "product_category_id"),
+    )
 
     STOCK: ClassVar[str] = "stock"
 
@@ -36,6 +52,10 @@ class Product(Base):
     long_description = Column(TEXT, nullable=True)
     stock = Column(Integer, nullable=False)
     price = Column(Integer, nullable=False)
+    # Review aggregates, maintained on every review write (see CRUDProductReview)
+    rating_sum = Column(Float, nullable=False, default=0, server_default=text("0"))
+    rating_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    avg_rating = Column(Float, nullable=True)
     created_timestamp = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
     updated_timestamp = Column(DateTime, nullable=True)
     product_category_id = Column(
@@ -49,6 +69,8 @@ class Product(Base):
     category = relationship("ProductCategory", back_populates="products")
     reviews = relationship("ProductReview")
 
+    review_count = synonym("rating_count")
+
 
 class ProductCategory(Base):
     __tablename__ = "product_category"
@@ -79,6 +101,13 @@ class ProductImage(Base):
 
 class ProductReview(Base):
     __tablename__ = "product_reviews"
+    __table_args__ = (
+        Index(
+            "ix_product_reviews_product_id_created_timestamp",
+            "product_id",
+            "created_timestamp",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, nullable=False)
     product_id = Column(
@@ -91,3 +120,50 @@ class ProductReview(Base):
     rating = Column(Float, nullable=False)
     created_timestamp = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
     updated_timestamp = Column(DateTime, nullable=True)
+
+
+def product_search_document(product_name, short_description):
+    """Full-text document searched by the product feed. The GIN index below is
+    built on this exact expression, so queries must use it unchanged."""
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(product_name, "") + " " + func.coalesce(short_description, ""),
+    )
+
+
+event.listen(
+    Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
+
+Index(
+    "ix_products_avg_rating_id",
+    Product.avg_rating.desc().nulls_last(),
+    Product.id.desc(),
+)
+# Index() can't find the table through the function calls, so attach it
+# explicitly; otherwise create_all silently skips it
+Product.__table__.append_constraint(
+    Index(
+        "ix_products_search_document",
+        product_search_document(Product.product_name, Product.short_description),
+        postgresql_using="gin",
+    )
+)
+Index(
+    "ix_products_product_name_trgm",
+    Product.product_name,
+    postgresql_using="gin",
+    postgresql_ops={"product_name": "gin_trgm_ops"},
+)
+Index(
+    "ix_products_short_description_trgm",
+    Product.short_description,
+    postgresql_using="gin",
+    postgresql_ops={"short_description": "gin_trgm_ops"},
+)
+Index(
+    "ix_product_category_category_name_trgm",
+    ProductCategory.category_name,
+    postgresql_using="gin",
+    postgresql_ops={"category_name": "gin_trgm_ops"},
+)
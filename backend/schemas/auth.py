@@ -3,7 +3,6 @@ from typing import ClassVar, Optional
 from pydantic import BaseModel, EmailStr, Field, model_validator
 
 from core.errors import InvalidRequest
-from core.schema import Tokens
 from schemas.base import ReturnBaseModel, Roles
 from utils.email_validation import email_validate
 from utils.validate_password import validate_password
@@ -51,6 +50,12 @@ class AuthUserResponse(ReturnBaseModel):
     is_superuser: bool = Field(False, hidden_from_schema=True)
 
 
+class Tokens(BaseModel):
+    access_token: str
+    refresh_token: str
+    default_role: Roles
+
+
 class RegisterAuthUserResponse(BaseModel):
     auth_user: AuthUserResponse
     tokens: Tokens
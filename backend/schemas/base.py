@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional
 from typing_extensions import Annotated
 from pydantic import BaseModel, StringConstraints
 
@@ -72,11 +72,19 @@ class StatusEnum(str, Enum):
     PENDING = "pending"
 
 
+class ProductSortEnum(str, Enum):
+    NEWEST = "newest"
+    RELEVANCE = "relevance"
+    RATING = "rating"
+
+
 class OrderStatusEnum(str, Enum):
     PROCESSING = "processing"
     SHIPPED = "shipped"
     # DELIVERED = "delivered"
     REFUNDED = "refunded"
+    CANCELLED = "cancelled"
+    REFUND_DUE = "refund_due"
 
 
 class ProductOptionalBase(BaseModel):
@@ -98,3 +106,9 @@ class CustomerVendorReturnBase(ReturnBaseModel):
 
 class HealthResponse(BaseModel):
     msg: str
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    checks: Dict[str, str]
+    queue_depth: Optional[int] = None
@@ -19,6 +19,8 @@ class CartUpdate(BaseModel):
 
 
 class CartReturn(ReturnBaseModel):
+    # Lines held in the Redis cart backend have no row id until flushed
+    id: Optional[int] = None
     product_id: int
     quantity: int
     customer_id: int
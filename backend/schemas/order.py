@@ -43,6 +43,11 @@ class PaymentDetailsCreate(BaseModel):
     paid_at: Optional[datetime] = None
 
 
+class PaymentEventCreate(BaseModel):
+    payment_ref: str
+    source: str
+
+
 class ShippingDetailsCreate(BaseModel):
     order_id: Optional[int] = None
     address: Optional[str] = None
@@ -62,6 +67,7 @@ class PaymentVerified(BaseModel):
     payment_verified: bool = True
     order_id: Optional[int] = None
     pickup_code: Optional[str] = None
+    refund_due: bool = False
 
 
 class OrderItemStatus(BaseModel):
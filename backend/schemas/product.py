@@ -46,7 +46,8 @@ class ProductReturn(ReturnBaseModel, ProductCreate):
 
 
 class ProductsReturn(ProductReturn):
-    reviews: Optional[list["ProductReviewReturn"]] = []
+    review_count: int = 0
+    avg_rating: Optional[float] = None
 
 
 class ProductUpdate(ProductOptionalBase):
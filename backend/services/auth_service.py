@@ -1,8 +1,10 @@
 from arq import ArqRedis
+from redis.asyncio import Redis
 from fastapi import BackgroundTasks, Header
 from fastapi.security import OAuth2PasswordRequestForm
 
 from core.errors import InvalidRequest, MissingResources, ResourcesExist
+from core.principal_cache import principal_cache
 from core.schema import RefreshTokenCreate
 from core.tokens import (
     create_forget_password_token,
@@ -27,7 +29,7 @@ from schemas import (
     ResetPassword,
     UsernameCheckResponse,
 )
-from utils.password_utils import hash_password, verify_password
+from utils.password_utils import password_hasher
 
 
 class AuthUserService:
@@ -40,6 +42,7 @@ class AuthUserService:
         queue_connection: ArqRedis,
         crud_customer: CRUDCustomer,
         crud_vendor: CRUDVendor,
+        redis: Redis,
     ):
         self.crud_auth_user = crud_auth_user
         self.crud_refresh_token = crud_refresh_token
@@ -47,6 +50,7 @@ class AuthUserService:
         self.queue_connection = queue_connection
         self.crud_customer = crud_customer
         self.crud_vendor = crud_vendor
+        self.redis = redis
 
     async def register_auth_user(
         self,
@@ -58,7 +62,7 @@ class AuthUserService:
         email = self.crud_auth_user.get_by_email(data_obj.email)
         if email:
             raise ResourcesExist("Email Exists")
-        data_obj.password = hash_password(data_obj.password)
+        data_obj.password = await password_hasher.hash(data_obj.password)
         new_user = await self.crud_auth_user.create(data_obj)
         otp_data_obj = OTPCreate(auth_id=new_user.id, otp_type=OTPType.EMAIL)
 
@@ -90,10 +94,15 @@ class AuthUserService:
         if not user_query:
             raise InvalidRequest("Incorrect Credentials")
 
-        if not verify_password(
+        valid, new_hash = await password_hasher.verify_and_update(
             plain_password=form_data.password, hashed_password=user_query.password
-        ):
+        )
+        if not valid:
             raise InvalidRequest("Incorrect Credentials")
+        if new_hash:
+            await self.crud_auth_user.update(
+                id=user_query.id, data_obj={AuthUser.PASSWORD: new_hash}
+            )
         tokens = generate_tokens(
             user_id=user_query.id,
             user_agent=user_agent,
@@ -125,6 +134,7 @@ class AuthUserService:
             await self.crud_auth_user.update(
                 id=data_obj.auth_id, data_obj={AuthUser.PHONE_VERIFIED: True}
             )
+        await principal_cache.invalidate(self.redis, data_obj.auth_id)
         return OtpVerified(verified=True)
 
     async def forget_password(
@@ -161,34 +171,47 @@ class AuthUserService:
 
     async def reset_password(self, data_obj: NewPassword, token: str):
 
-        token_data = verify_access_token(token)
+        token_data = await verify_access_token(token, self.redis)
         user_query = self.crud_auth_user.get_or_raise_exception(id=token_data.user_id)
-        if verify_password(data_obj.password, hashed_password=user_query.password):
+        if await password_hasher.verify(
+            data_obj.password, hashed_password=user_query.password
+        ):
             raise InvalidRequest("Can't change password to old password")
-        data_obj.password = hash_password(data_obj.password)
+        data_obj.password = await password_hasher.hash(data_obj.password)
         await self.crud_auth_user.update(id=token_data.user_id, data_obj=data_obj)
-        deactivate_token(auth_id=user_query.id, token=token)
+        await principal_cache.invalidate(self.redis, token_data.user_id)
+        await deactivate_token(
+            auth_id=user_query.id,
+            token=token,
+            crud_refresh_token=self.crud_refresh_token,
+            redis=self.redis,
+        )
         await self.crud_otp.delete_by_auth_id(auth_id=token_data.user_id)
 
         return ResetPassword()
 
-    async def change_password(
-        self, data_obj: ChangePassword, current_user_id: int, current_user_password: str
-    ):
-        if not verify_password(
+    async def change_password(self, data_obj: ChangePassword, current_user_id: int):
+        # Cached principals don't carry the password hash, so read it fresh
+        current_user_password = self.crud_auth_user.get_or_raise_exception(
+            id=current_user_id
+        ).password
+        if not await password_hasher.verify(
             plain_password=data_obj.old_password, hashed_password=current_user_password
         ):
             raise InvalidRequest("Wrong old password")
 
-        if verify_password(
+        if await password_hasher.verify(
             plain_password=data_obj.new_password, hashed_password=current_user_password
         ):
             raise InvalidRequest("Cannot change to old password")
 
         await self.crud_auth_user.update(
             id=current_user_id,
-            data_obj={AuthUser.PASSWORD: hash_password(data_obj.new_password)},
+            data_obj={
+                AuthUser.PASSWORD: await password_hasher.hash(data_obj.new_password)
+            },
         )
+        await principal_cache.invalidate(self.redis, current_user_id)
 
         return PasswordChanged()
 
@@ -1,20 +1,31 @@
-from typing import List, Tuple
+from datetime import datetime
+import json
+import logging
+from typing import Optional
+
 from arq import ArqRedis
+from redis.asyncio import Redis
 
-from core.errors import InvalidRequest
-from core.paystack import PaystackClient
+from core.errors import InvalidRequest, MissingResources
+from core.paystack import PaystackClient, verify_webhook_signature
+from core.response_cache import response_cache
 from crud import (
+    AsyncCRUDCart,
+    AsyncCRUDCustomer,
+    AsyncCRUDProduct,
     CRUDAuthUser,
     CRUDProduct,
     CRUDCart,
     CRUDCustomer,
     CRUDOrder,
     CRUDPaymentDetails,
+    CRUDPaymentEvent,
     CRUDOrderItem,
     CRUDVendor,
+    RedisCartStore,
 )
-from models import AuthUser
-from schemas.base import PaymentMethodEnum, StatusEnum
+from models import AuthUser, Customer, Product
+from schemas.base import OrderStatusEnum, PaymentMethodEnum, StatusEnum
 from schemas import (
     CartCreate,
     CartUpdate,
@@ -22,9 +33,12 @@ from schemas import (
     OrderCreate,
     PaymentDetailsCreate,
     PaymentVerified,
+    ShippingDetailsCreate,
 )
 from utils.random_id import generate_pickup_code
-from utils.postmark_client import send_postmark_email
+
+
+logger = logging.getLogger(__name__)
 
 
 class CartService:
@@ -41,6 +55,12 @@ class CartService:
         crud_order_item: CRUDOrderItem,
         crud_vendor: CRUDVendor,
         paystack: PaystackClient,
+        crud_payment_event: CRUDPaymentEvent,
+        redis: Redis,
+        cart_store: Optional[RedisCartStore] = None,
+        async_crud_cart: Optional[AsyncCRUDCart] = None,
+        async_crud_product: Optional[AsyncCRUDProduct] = None,
+        async_crud_customer: Optional[AsyncCRUDCustomer] = None,
     ):
         self.crud_auth_user = crud_auth_user
         self.crud_product = crud_product
@@ -51,24 +71,33 @@ class CartService:
         self.crud_order_item = crud_order_item
         self.crud_vendor = crud_vendor
         self.paystack = paystack
+        self.crud_payment_event = crud_payment_event
         self.queue_connection = queue_connection
+        self.cart_store = cart_store
+        self.redis = redis
+        self.async_crud_cart = async_crud_cart
+        self.async_crud_product = async_crud_product
+        self.async_crud_customer = async_crud_customer
 
     async def create_cart(self, data_obj: CartCreate, customer_id: int):
-        product = self.crud_product.get_or_raise_exception(data_obj.product_id)
-        cart_item = self.crud_cart.get_by_product_id_and_customer_id(
-            product_id=data_obj.product_id, customer_id=customer_id
+        if self.cart_store:
+            product = self.crud_product.get_or_raise_exception(data_obj.product_id)
+            return await self._create_redis_cart(data_obj, customer_id, product)
+        cart = await self.crud_cart.add_or_increment(
+            customer_id=customer_id,
+            product_id=data_obj.product_id,
+            quantity=data_obj.quantity,
         )
-
-        if cart_item and cart_item.customer_id == customer_id:
-            raise InvalidRequest("Already add item to cart")
-        data_obj.customer_id = customer_id
-        if data_obj.quantity > product.stock:
+        if not cart:
+            # Only the failure path pays for reading the product
+            product = self.crud_product.get_or_raise_exception(data_obj.product_id)
             raise InvalidRequest(f"Stocks Available: {product.stock}")
-        cart = await self.crud_cart.create(data_obj)
 
         return cart
 
     async def update_cart(self, data_obj: CartUpdate, customer_id: int):
+        if self.cart_store:
+            return await self._update_redis_cart(data_obj, customer_id)
         product = await self.crud_cart.check_if_product_id_exist_in_cart(
             customer_id=customer_id, product_id=data_obj.product_id
         )
@@ -86,6 +115,10 @@ class CartService:
         return updated_cart
 
     async def delete_cart_item(self, product_id: int, customer_id: int):
+        if self.cart_store:
+            if not await self.cart_store.remove_item(customer_id, product_id):
+                raise InvalidRequest("Product doesn't exist in cart")
+            return
         await self.crud_cart.check_if_product_id_exist_in_cart(
             customer_id=customer_id, product_id=product_id
         )
@@ -93,10 +126,17 @@ class CartService:
         await self.crud_cart.delete_cart_item_by_product_id(product_id=product_id)
 
     async def clear_cart(self, customer_id: int):
+        if self.cart_store:
+            await self.cart_store.clear(customer_id)
+            return
         await self.crud_cart.clear_cart(customer_id)
 
     async def get_cart_summary(self, customer_id: int):
-        cart_summary = await self.crud_cart.get_cart_summary(customer_id=customer_id)
+        if self.cart_store:
+            return await self._get_redis_cart_summary(customer_id)
+        cart_summary = await self.async_crud_cart.get_cart_summary(
+            customer_id=customer_id
+        )
         return cart_summary
 
     async def checkout(
@@ -104,6 +144,9 @@ class CartService:
         data_obj: CheckoutCreate,
         current_user: AuthUser,
     ):
+        if self.cart_store:
+            # Orders are built from the cart table, so persist the Redis cart first
+            await self.cart_store.flush(current_user.role_id)
 
         cart_summary = await self.crud_cart.get_cart_summary(
             customer_id=current_user.role_id
@@ -115,50 +158,125 @@ class CartService:
             total_amount=cart_summary["total_amount"],
             pickup_code=generate_pickup_code(),
         )
-        products_and_quantity_in_cart: List[Tuple] = [
-            (products.product, products.quantity)
-            for products in cart_summary["cart_items"]
+        order_items = [
+            {
+                "product_id": item.product.id,
+                "vendor_id": item.product.vendor_id,
+                "price": item.product.price,
+                "quantity": item.quantity,
+            }
+            for item in cart_summary["cart_items"]
         ]
+        shipping_details = self._fill_shipping_details(
+            data_obj.shipping_details or ShippingDetailsCreate(), customer
+        )
+        payment_method = data_obj.payment_details.payment_method
+        pays_online = payment_method in (
+            PaymentMethodEnum.CARD,
+            PaymentMethodEnum.BANK_TRANSFER,
+        )
 
-        for product, quantity in products_and_quantity_in_cart:
-            if quantity > product.stock:
-                raise InvalidRequest(
-                    f"{product.product_name} has: {product.stock} stocks left"
-                )
-
-        order = await self.crud_order.create(order_data_obj)
-        await self.queue_connection.enqueue_job(
-            "add_shipping_details", order, data_obj.shipping_details
+        # Online payments are recorded once Paystack confirms them; unpaid
+        # orders are cancelled by the expire_unpaid_orders cron
+        order = await self.crud_order.create_order_with_items(
+            order_obj=order_data_obj,
+            order_items=order_items,
+            shipping_details=shipping_details,
+            payment_details=(
+                None
+                if pays_online
+                else PaymentDetailsCreate(payment_method=payment_method)
+            ),
         )
-        await self.queue_connection.enqueue_job("add_order_items", order)
+        # Checkout reserved stock, so cached listings are out of date
+        await response_cache.invalidate(self.redis)
         paystack_metadata = {"order": order, "customer": customer}
-        if (
-            data_obj.payment_details.payment_method == PaymentMethodEnum.CARD
-            or data_obj.payment_details.payment_method
-            == PaymentMethodEnum.BANK_TRANSFER
-        ):
+        if pays_online:
             paystack_rsp = await self.paystack.initialize_payment(
                 amount=int(cart_summary["total_amount"]),
                 email=current_user.email,
-                channel=data_obj.payment_details.payment_method,
+                channel=payment_method,
                 **paystack_metadata,
             )
+            if "error" in paystack_rsp:
+                # No charge can follow, so hand the reserved stock back now
+                await self._cancel_order(order.id)
+                return paystack_rsp
             # surface order tracking details along with the payment init response
             paystack_rsp["order_id"] = order.id
             paystack_rsp["pickup_code"] = order.pickup_code
             return paystack_rsp
 
-        payment_details_obj = PaymentDetailsCreate(
-            order_id=order.id,
-            payment_method=data_obj.payment_details.payment_method,
-            amount=order.total_amount,
-        )
-        await self.crud_payment.create(payment_details_obj)
-
-        await self.queue_connection.enqueue_job("update_stock_after_checkout", order.id)
-
         return order
 
+    async def _create_redis_cart(
+        self, data_obj: CartCreate, customer_id: int, product: Product
+    ):
+        quantity = await self.cart_store.add_item(
+            customer_id, product.id, data_obj.quantity, stock=product.stock
+        )
+        if quantity is None:
+            raise InvalidRequest(f"Stocks Available: {product.stock}")
+        return {
+            "product_id": product.id,
+            "quantity": quantity,
+            "customer_id": customer_id,
+            "product": product,
+            "customer": self.crud_customer.get(customer_id),
+        }
+
+    async def _update_redis_cart(self, data_obj: CartUpdate, customer_id: int):
+        if await self.cart_store.get_quantity(customer_id, data_obj.product_id) is None:
+            raise InvalidRequest("Product doesn't exist in cart")
+        product = self.crud_product.get_or_raise_exception(data_obj.product_id)
+        if data_obj.quantity > product.stock:
+            raise InvalidRequest(f"{product.stock} item stock Left")
+        if not await self.cart_store.set_quantity(
+            customer_id, data_obj.product_id, data_obj.quantity
+        ):
+            raise InvalidRequest("Product doesn't exist in cart")
+        return {
+            "product_id": data_obj.product_id,
+            "quantity": data_obj.quantity,
+            "updated_timestamp": datetime.utcnow(),
+        }
+
+    async def _get_redis_cart_summary(self, customer_id: int):
+        items = await self.cart_store.get_items(customer_id)
+        if not items:
+            raise MissingResources("No items in cart")
+        products = await self.async_crud_product.get_products_by_ids(items)
+        customer = await self.async_crud_customer.get(customer_id)
+        cart_items = [
+            {
+                "product_id": product.id,
+                "quantity": items[product.id],
+                "customer_id": customer_id,
+                "product": product,
+                "customer": customer,
+            }
+            for product in products
+        ]
+        return {
+            "total_items_quantity": sum(item["quantity"] for item in cart_items),
+            "total_amount": sum(
+                item["quantity"] * item["product"].price for item in cart_items
+            ),
+            "cart_items": cart_items,
+        }
+
+    @staticmethod
+    def _fill_shipping_details(
+        shipping_details: ShippingDetailsCreate, customer: Customer
+    ) -> ShippingDetailsCreate:
+        shipping_details.contact_information = (
+            shipping_details.contact_information or customer.phone_number
+        )
+        shipping_details.address = shipping_details.address or customer.address
+        shipping_details.state = shipping_details.state or customer.state
+        shipping_details.country = shipping_details.country or customer.country
+        return shipping_details
+
     async def verify_order_payment(
         self,
         payment_ref: str,
@@ -168,7 +286,61 @@ class CartService:
         if payment_details:
             raise InvalidRequest("Payment Already Successful")
 
-        payment_rsp = await self.paystack.verify_payment(payment_ref=payment_ref)
+        # Concurrent polls and the webhook race for the same reference; only
+        # the claim holder calls Paystack and writes the payment row
+        if not self.crud_payment_event.claim(payment_ref, source="verify"):
+            if self.crud_payment.get_by_payment_ref(payment_ref=payment_ref):
+                raise InvalidRequest("Payment Already Successful")
+            raise InvalidRequest("Payment is being processed, try again shortly")
+
+        try:
+            payment_rsp = await self.paystack.verify_payment(payment_ref=payment_ref)
+            payment_verified = await self._record_payment(payment_rsp)
+        except Exception:
+            self.crud_payment_event.release(payment_ref)
+            raise
+        self.crud_payment_event.mark_processed(payment_ref)
+        return payment_verified
+
+    async def ingest_paystack_webhook(self, body: bytes, signature: Optional[str]):
+        if not verify_webhook_signature(body, signature):
+            raise InvalidRequest("Invalid webhook signature")
+
+        event = json.loads(body)
+        if event.get("event") != "charge.success":
+            return
+        transaction = event["data"]
+        if self.crud_payment.get_by_payment_ref(payment_ref=transaction["reference"]):
+            return
+        # Paystack redelivers until it gets a 2xx, so acknowledge straight away.
+        # Each delivery gets its own job: a shared job id would make arq drop
+        # redeliveries while an earlier, possibly failed, result is kept. The
+        # payment_events claim makes sure only one of them records the payment.
+        await self.queue_connection.enqueue_job("process_paystack_charge", transaction)
+
+    async def process_paystack_charge(self, transaction: dict) -> bool:
+        """
+        Record a signed ``charge.success`` payload without calling Paystack.
+
+        Returns False if another caller currently holds the reference.
+        """
+        payment_ref = transaction["reference"]
+        if not self.crud_payment_event.claim(payment_ref, source="webhook"):
+            return self.crud_payment.get_by_payment_ref(payment_ref) is not None
+
+        try:
+            await self._record_payment(transaction)
+        except Exception:
+            self.crud_payment_event.release(payment_ref)
+            raise
+        self.crud_payment_event.mark_processed(payment_ref)
+        return True
+
+    async def _cancel_order(self, order_id: int):
+        await self.crud_order.cancel_order(order_id=order_id)
+        await response_cache.invalidate(self.redis)
+
+    async def _record_payment(self, payment_rsp: dict) -> PaymentVerified:
         order_id = payment_rsp["metadata"]["order_id"]
         pickup_code = payment_rsp["metadata"].get("pickup_code")
         pay_method = payment_rsp.get("channel")
@@ -179,14 +351,14 @@ class CartService:
                     "You have a pending transaction, Complete Your Payment"
                 )
             case StatusEnum.FAILED:
-                await self.crud_order.delete(id=order_id)
+                await self._cancel_order(order_id)
                 raise InvalidRequest(
                     "Payment Failed, Checkout again and complete Payment "
                 )
             case StatusEnum.SUCCESS:
                 pass
             case _:
-                await self.crud_order.delete(id=order_id)
+                await self._cancel_order(order_id)
                 raise InvalidRequest("Contact Paystack and try again")
 
         payment_details_obj = PaymentDetailsCreate(
@@ -197,37 +369,33 @@ class CartService:
             status=StatusEnum.SUCCESS,
             paid_at=payment_rsp["paid_at"],
         )
-        await self.queue_connection.enqueue_job("update_stock_after_checkout", order_id)
-        await self.crud_payment.create(payment_details_obj)
-
-        order = self.crud_order.get(order_id)
-        order_items = self.crud_order_item.get_by_order_id(order_id=order_id) or []
-        vendor = None
-        if order_items:
-            vendor = self.crud_vendor.get(order_items[0].vendor_id)
-
-        seller_name = (
-            f"{vendor.first_name} {vendor.last_name}" if vendor else "the store"
-        )
-        order_time = vendor.order_time if vendor else None
-        total_price = order.total_amount if order else payment_details_obj.amount
-
-        text_body = (
-            f"Hi,\n\nYour order has been placed for {seller_name}.\n"
-            f"Pickup code: {pickup_code}\n"
-            f"Amount: {total_price}\n"
-            f"Payment method: {pay_method}\n"
+        previous_status, order_status = await self.crud_order.record_payment(
+            payment_details_obj
         )
-        if order_time:
-            text_body += f"Please head to the store by: {order_time}\n"
-        text_body += "\nThank you for shopping with us."
+        if previous_status == OrderStatusEnum.CANCELLED:
+            # The order had expired; its stock was reserved again or refund is owed
+            await response_cache.invalidate(self.redis)
+        if order_status == OrderStatusEnum.REFUND_DUE:
+            logger.error(
+                f"Order {order_id} was paid after it expired and its stock is "
+                f"gone; refund payment {payment_details_obj.payment_ref}"
+            )
+            return PaymentVerified(
+                payment_verified=True,
+                order_id=order_id,
+                pickup_code=pickup_code,
+                refund_due=True,
+            )
 
         customer_email = payment_rsp.get("customer", {}).get("email")
         if customer_email:
-            await send_postmark_email(
-                to_email=customer_email,
-                subject="Order confirmed",
-                text_body=text_body,
+            await self.queue_connection.enqueue_job(
+                "send_order_confirmation_email",
+                order_id,
+                customer_email,
+                pickup_code,
+                pay_method,
+                payment_details_obj.amount,
             )
 
         return PaymentVerified(
@@ -69,7 +69,11 @@ class OrderService:
             raise InvalidRequest("Not Your Item")
         if order_item.status == OrderStatusEnum.PROCESSING:
 
-            return await self.crud_order_item.update(
+            updated_order_item = await self.crud_order_item.update(
                 id=order_item_id, data_obj={data_obj.STATUS: data_obj.status}
             )
+            await self.crud_order.mark_completed_orders_as_shipped(
+                order_id=order_item.order_id
+            )
+            return updated_order_item
         raise InvalidRequest("Item Status has been changed to Shipped or Refunded")
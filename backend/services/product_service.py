@@ -1,7 +1,14 @@
+from datetime import datetime
+from typing import Optional
+
 from arq import ArqRedis
+from redis.asyncio import Redis
 
 from core.errors import InvalidRequest, MissingResources
+from core.response_cache import response_cache
 from crud import (
+    AsyncCRUDProduct,
+    AsyncCRUDProductCategory,
     CRUDAuthUser,
     CRUDProduct,
     CRUDProductCategory,
@@ -9,6 +16,7 @@ from crud import (
     CRUDProductReview,
 )
 from models import AuthUser, ProductCategory
+from schemas.base import ProductSortEnum
 from schemas import (
     ProductCreate,
     ProductImageUpdate,
@@ -17,6 +25,7 @@ from schemas import (
     ProductUpdate,
     ProductImageCreate,
 )
+from utils.cursor import decode_cursor
 from utils.generate_sku import generate_random_sku
 
 
@@ -30,6 +39,9 @@ class ProductService:
         crud_product_image: CRUDProductImage,
         crud_product_review: CRUDProductReview,
         queue_connection: ArqRedis,
+        redis: Redis,
+        async_crud_product: AsyncCRUDProduct,
+        async_crud_product_category: AsyncCRUDProductCategory,
     ):
         self.crud_auth_user = crud_auth_user
         self.crud_product = crud_product
@@ -37,9 +49,12 @@ class ProductService:
         self.crud_product_image = crud_product_image
         self.crud_product_review = crud_product_review
         self.queue_connection = queue_connection
+        self.redis = redis
+        self.async_crud_product = async_crud_product
+        self.async_crud_product_category = async_crud_product_category
 
     async def get_product_categories(self):
-        categories = self.crud_product_category.get_multi(limit=1000)
+        categories = await self.async_crud_product_category.get_all()
         return categories
 
     async def create_product(
@@ -70,6 +85,8 @@ class ProductService:
         ]
         await self.crud_product_image.bulk_insert(data_objs=images_obj)
 
+        await response_cache.invalidate(self.redis)
+
         new_product = self.crud_product.get_single_product_by_id(id=product.id)
         return new_product
 
@@ -78,9 +95,17 @@ class ProductService:
         search: str,
         skip: int,
         limit: int,
+        after: Optional[str] = None,
+        sort: ProductSortEnum = ProductSortEnum.NEWEST,
+        min_rating: Optional[float] = None,
     ):
-        products = self.crud_product.get_all_products_public(
-            search=search, skip=skip, limit=limit
+        products = await self.async_crud_product.get_all_products_public(
+            search=search,
+            skip=skip,
+            limit=limit,
+            after=decode_cursor(after, datetime, int) if after else None,
+            sort=sort,
+            min_rating=min_rating,
         )
         if not products:
             raise MissingResources("No Products")
@@ -92,10 +117,17 @@ class ProductService:
         skip: int,
         limit: int,
         vendor_id: int,
+        after: Optional[str] = None,
+        sort: ProductSortEnum = ProductSortEnum.NEWEST,
     ):
 
         product = self.crud_product.get_products_for_vendor(
-            search=search, vendor_id=vendor_id, skip=skip, limit=limit
+            search=search,
+            vendor_id=vendor_id,
+            skip=skip,
+            limit=limit,
+            after=decode_cursor(after, datetime, int) if after else None,
+            sort=sort,
         )
         if not product:
             raise MissingResources("You haven't added any products yet")
@@ -105,15 +137,20 @@ class ProductService:
         self,
         skip: int,
         limit: int,
+        after: Optional[str] = None,
     ):
-        product = self.crud_product.sort_product_by_price(skip=skip, limit=limit)
+        product = await self.async_crud_product.sort_product_by_price(
+            skip=skip,
+            limit=limit,
+            after=decode_cursor(after, int, int) if after else None,
+        )
         return product
 
     async def get_one_product(
         self,
         product_id: int,
     ):
-        product = self.crud_product.get_active_products(id=product_id)
+        product = await self.async_crud_product.get_active_product(id=product_id)
 
         return product
 
@@ -140,6 +177,7 @@ class ProductService:
         updated_product = await self.crud_product.update(
             id=product_id, data_obj=data_obj
         )
+        await response_cache.invalidate(self.redis)
 
         return updated_product
 
@@ -159,6 +197,7 @@ class ProductService:
         updated_product_image = await self.crud_product_image.update(
             id=product_image_id, data_obj=data_obj
         )
+        await response_cache.invalidate(self.redis)
 
         return updated_product_image
 
@@ -171,13 +210,28 @@ class ProductService:
         if product.vendor_id != vendor_id:
             raise InvalidRequest("Product doesn't belong to you")
         await self.crud_product.delete(product_id)
+        await response_cache.invalidate(self.redis)
+
+    async def get_product_reviews(
+        self,
+        product_id: int,
+        skip: int,
+        limit: int,
+    ):
+        self.crud_product.get_active_products(id=product_id)
+        reviews = self.crud_product_review.get_reviews_for_product(
+            product_id=product_id, skip=skip, limit=limit
+        )
+        return reviews
 
     async def create_product_review(
         self,
         data_obj: ProductReviewCreate,
     ):
         self.crud_product.get_active_products(id=data_obj.product_id)
-        product_review = await self.crud_product_review.create(data_obj)
+        product_review = await self.crud_product_review.create_review(data_obj)
+        # Listings carry each product's rating aggregates
+        await response_cache.invalidate(self.redis)
         return product_review
 
     async def update_product_review(
@@ -186,7 +240,8 @@ class ProductService:
         data_obj: ProductReviewUpdate,
     ):
         review = self.crud_product_review.get_or_raise_exception(id=review_id)
-        updated_review = await self.crud_product_review.update(
-            id=review.id, data_obj=data_obj
+        updated_review = await self.crud_product_review.update_review(
+            review=review, data_obj=data_obj
         )
+        await response_cache.invalidate(self.redis)
         return updated_review
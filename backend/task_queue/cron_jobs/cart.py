@@ -0,0 +1,34 @@
+import logging
+
+from core import settings
+from crud import CRUDCart, RedisCartStore
+from crud.cart_store import DIRTY_CARTS_KEY
+
+
+logger = logging.getLogger(__name__)
+
+
+async def flush_dirty_carts(ctx):
+    if settings.CART_BACKEND != "redis":
+        return
+    crud_cart: CRUDCart = ctx["crud_cart"]
+    cart_store = RedisCartStore(redis=ctx["redis"], crud_cart=crud_cart)
+
+    flushed = 0
+    # Carts dirtied while flushing, or re-queued after a failure, wait for the
+    # next run so one bad cart can't keep this job busy
+    pending = await cart_store.redis.scard(DIRTY_CARTS_KEY)
+    while flushed < pending:
+        customer_ids = await cart_store.pop_dirty_customers(
+            settings.CART_FLUSH_BATCH_SIZE
+        )
+        if not customer_ids:
+            break
+        for customer_id in customer_ids:
+            try:
+                await cart_store.flush(customer_id)
+            except Exception as e:
+                logger.error(f"Failed to flush cart for customer {customer_id}: {e}")
+            flushed += 1
+    if flushed:
+        logger.info(f"Flushed {flushed} carts to the database")
@@ -1,7 +1,11 @@
 from arq import cron
 from arq.cron import CronJob
 
-from .order import check_order_items_and_update_order_status_to_shipped
+from .cart import flush_dirty_carts
+from .order import (
+    check_order_items_and_update_order_status_to_shipped,
+    expire_unpaid_orders,
+)
 
 
 def at_every_x_minutes(x: int, start: int = 0, end: int = 59):
@@ -9,7 +13,7 @@ def at_every_x_minutes(x: int, start: int = 0, end: int = 59):
 
 
 def get_cron_jobs():
-    return [_update_order_status()]
+    return [_update_order_status(), _flush_dirty_carts(), _expire_unpaid_orders()]
 
 
 def _update_order_status() -> CronJob:
@@ -19,3 +23,19 @@ def _update_order_status() -> CronJob:
         unique=True,
         run_at_startup=True,
     )
+
+
+def _flush_dirty_carts() -> CronJob:
+    return cron(
+        flush_dirty_carts,  # type:ignore
+        minute=at_every_x_minutes(1, end=60),
+        unique=True,
+    )
+
+
+def _expire_unpaid_orders() -> CronJob:
+    return cron(
+        expire_unpaid_orders,  # type:ignore
+        minute=at_every_x_minutes(5),
+        unique=True,
+    )
@@ -1,28 +1,29 @@
+from datetime import timedelta
+import logging
+
+from core import settings
+from core.response_cache import response_cache
 from crud import CRUDOrder
 
-from models import Order
-from schemas.base import OrderStatusEnum
+
+logger = logging.getLogger(__name__)
 
 
 async def check_order_items_and_update_order_status_to_shipped(ctx):
     crud_order: CRUDOrder = ctx["crud_order"]
 
-    orders = await crud_order.get_all_orders()
-    order_items = [
-        order.order_items
-        for order in orders
-        if order.status == OrderStatusEnum.PROCESSING
-    ]
-
-    order_items_iter = iter(order_items)
-    for index in range(len(order_items)):
-        order_items = next(order_items_iter)
-        order_id = order_items[index].order_id
-        status = [item.status for item in order_items]
-
-        if OrderStatusEnum.PROCESSING in status or OrderStatusEnum.REFUNDED in status:
-            pass
-        else:
-            await crud_order.update(
-                id=order_id, data_obj={Order.STATUS: OrderStatusEnum.SHIPPED}
-            )
+    shipped_order_ids = await crud_order.mark_completed_orders_as_shipped()
+    if shipped_order_ids:
+        logger.info(f"Marked orders {shipped_order_ids} as shipped")
+
+
+async def expire_unpaid_orders(ctx):
+    crud_order: CRUDOrder = ctx["crud_order"]
+
+    expired_order_ids = await crud_order.cancel_expired_unpaid_orders(
+        older_than=timedelta(minutes=settings.UNPAID_ORDER_EXPIRY)
+    )
+    if expired_order_ids:
+        # Their stock is back on sale, so cached listings are out of date
+        await response_cache.invalidate(ctx["redis"])
+        logger.info(f"Cancelled unpaid orders {expired_order_ids}")
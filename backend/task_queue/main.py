@@ -1,6 +1,11 @@
+from datetime import datetime, timezone
+import time
+
+from fastapi import Request
 from httpx import AsyncClient
-from arq import create_pool
+from arq import ArqRedis
 from arq.connections import RedisSettings
+from prometheus_client import start_http_server
 
 from crud import (
     get_crud_customer,
@@ -12,25 +17,49 @@ from crud import (
     get_crud_auth_user,
     get_crud_order_item,
     get_crud_payment_details,
+    get_crud_payment_event,
     get_crud_shipping_details,
     get_crud_product_image,
 )
 from task_queue.cron_jobs.main import get_cron_jobs
 from task_queue.tasks import registered_tasks
-from core.db import get_db
+from core.db import SessionLocal, engine
 from core import settings
+from core.http_clients import close_http_clients
+from core.metrics import ARQ_JOB_DURATION, ARQ_JOB_QUEUE_DELAY, register_pool_metrics
+from utils.password_utils import password_hasher
 
 
 REDIS_SETTINGS = RedisSettings(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
 
-
-async def get_queue_connection():
-    return await create_pool(REDIS_SETTINGS)
+async def get_queue_connection(request: Request) -> ArqRedis:
+    """Queue client for the API, created at startup on the shared Redis pool."""
+    return request.app.state.queue_connection
 
 
 async def startup(ctx):
-    db = get_db()
     ctx["session"] = AsyncClient()
+    if settings.WORKER_METRICS_PORT:
+        register_pool_metrics("worker", engine)
+        start_http_server(settings.WORKER_METRICS_PORT)
+
+
+async def shutdown(ctx):
+    await ctx["session"].aclose()
+    await close_http_clients()
+    password_hasher.shutdown()
+
+
+async def on_job_start(ctx):
+    # Every job gets its own DB session so concurrent jobs never share state
+    ctx["job_start_time"] = time.perf_counter()
+    enqueue_time = ctx.get("enqueue_time")
+    if enqueue_time:
+        ARQ_JOB_QUEUE_DELAY.observe(
+            (datetime.now(timezone.utc) - enqueue_time).total_seconds()
+        )
+    db = SessionLocal()
+    ctx["db"] = db
     ctx["crud_auth_user"] = get_crud_auth_user(db)
     ctx["crud_otp"] = get_crud_otp(db)
     ctx["crud_product"] = get_crud_product(db)
@@ -42,15 +71,19 @@ async def startup(ctx):
     ctx["crud_shipping_details"] = get_crud_shipping_details(db)
     ctx["crud_payment_details"] = get_crud_payment_details(db)
     ctx["crud_order_item"] = get_crud_order_item(db)
+    ctx["crud_payment_event"] = get_crud_payment_event(db)
 
 
-async def shutdown(ctx):
-    await ctx["session"].aclose()
+async def after_job_end(ctx):
+    ctx["db"].close()
+    ARQ_JOB_DURATION.observe(time.perf_counter() - ctx["job_start_time"])
 
 
 class WorkerSettings:
     on_startup = startup
     on_shutdown = shutdown
+    on_job_start = on_job_start
+    after_job_end = after_job_end
     redis_settings = REDIS_SETTINGS
     functions = registered_tasks
     cron_jobs = get_cron_jobs()
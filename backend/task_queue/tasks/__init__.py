@@ -1,5 +1,7 @@
 from .auth_user_tasks import *
 from .cart_tasks import *
+from .email_tasks import *
+from .payment_tasks import *
 from .product_tasks import *
 
 
@@ -11,4 +13,8 @@ registered_tasks = [
     add_shipping_details,
     add_order_items,
     send_email_otp,
+    backfill_product_rating_aggregates,
+    send_order_confirmation_email,
+    flush_email_outbox,
+    process_paystack_charge,
 ]
@@ -1,8 +1,9 @@
 import logging
 
+from core.principal_cache import principal_cache
 from crud import CRUDAuthUser, CRUDOtp
 from models import AuthUser
-from utils.password_utils import hash_password
+from utils.password_utils import password_hasher
 
 
 logger = logging.getLogger(__name__)
@@ -12,8 +13,9 @@ async def update_auth_password(ctx, auth_id, password):
     crud_auth_user: CRUDAuthUser = ctx["crud_auth_user"]
     await crud_auth_user.update(
         id=auth_id,
-        data_obj={AuthUser.PASSWORD: hash_password(password)},
+        data_obj={AuthUser.PASSWORD: await password_hasher.hash(password)},
     )
+    await principal_cache.invalidate(ctx["redis"], auth_id)
 
 
 async def update_auth_details(ctx, auth_id, data_obj):
@@ -22,6 +24,7 @@ async def update_auth_details(ctx, auth_id, data_obj):
         id=auth_id,
         data_obj=data_obj,
     )
+    await principal_cache.invalidate(ctx["redis"], auth_id)
 
 
 async def send_email_otp(ctx, data_obj, email):
@@ -1,12 +1,17 @@
+import logging
 from typing import List, Tuple
 
+from core.errors import InvalidRequest
+from core.response_cache import response_cache
 from crud import CRUDProduct
 from crud import CRUDCustomer, CRUDShippingDetails, CRUDOrderItem, CRUDCart
-from models import Product
 from models.order import Order
 from schemas import ShippingDetailsCreate, OrderItemsCreate
 
 
+logger = logging.getLogger(__name__)
+
+
 async def add_shipping_details(
     ctx, order: Order, shipping_details: ShippingDetailsCreate
 ):
@@ -40,18 +45,17 @@ async def add_order_items(ctx, order: Order):
 
     cart_summary = await crud_cart.get_cart_summary(customer_id=order.customer_id)
 
-    products_and_quantity_in_cart_tuple = [
-        (products.product, products.quantity) for products in cart_summary["cart_items"]
-    ]
-    for product, quantity in products_and_quantity_in_cart_tuple:
-        order_item = OrderItemsCreate(
+    order_items = [
+        OrderItemsCreate(
             order_id=order.id,  # type: ignore
-            vendor_id=product.vendor_id,
-            price=product.price,
-            quantity=quantity,
-            product_id=product.id,
+            vendor_id=item.product.vendor_id,
+            price=item.product.price,
+            quantity=item.quantity,
+            product_id=item.product.id,
         )
-        await crud_order_item.create(order_item)
+        for item in cart_summary["cart_items"]
+    ]
+    await crud_order_item.create_many(order_items)
     return
 
 
@@ -59,12 +63,13 @@ async def update_stock_after_checkout(ctx, order_id):
     crud_order_item: CRUDOrderItem = ctx["crud_order_item"]
     crud_product: CRUDProduct = ctx["crud_product"]
 
-    order_items = crud_order_item.get_by_order_id(order_id)
-    product_id_and_quantity: List[Tuple[int]] = [
+    order_items = crud_order_item.get_by_order_id(order_id) or []
+    product_id_and_quantity: List[Tuple[int, int]] = [
         (item.product_id, item.quantity) for item in order_items
     ]
-    for product_id, cart_item_quantity in product_id_and_quantity:
-        product = crud_product.get_active_products(id=product_id)
-        quantity = product.stock - cart_item_quantity
-        await crud_product.update(id=product_id, data_obj={Product.STOCK: quantity})
-    return
+    try:
+        await crud_product.decrement_stock(product_id_and_quantity)
+    except InvalidRequest as e:
+        logger.error(f"Stock update for order {order_id} rejected: {e.detail}")
+        return
+    await response_cache.invalidate(ctx["redis"])
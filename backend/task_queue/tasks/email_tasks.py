@@ -0,0 +1,133 @@
+import json
+import logging
+import time
+from typing import List, Optional
+
+from arq import ArqRedis, Retry
+from httpx import HTTPStatusError
+
+from core import settings
+from crud import CRUDOrder
+from models import Order, Vendor
+from utils.postmark_client import build_postmark_message, send_postmark_batch
+
+
+logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_KEY = "email:outbox"
+EMAIL_DEAD_LETTER_KEY = "email:dead_letter"
+POSTMARK_BATCH_LIMIT = 500
+
+
+def compose_order_confirmation(
+    order: Optional[Order],
+    vendor: Optional[Vendor],
+    pickup_code: Optional[str],
+    pay_method: Optional[str],
+    amount: Optional[float],
+) -> str:
+    seller_name = f"{vendor.first_name} {vendor.last_name}" if vendor else "the store"
+    order_time = vendor.order_time if vendor else None
+    total_price = order.total_amount if order else amount
+
+    text_body = (
+        f"Hi,\n\nYour order has been placed for {seller_name}.\n"
+        f"Pickup code: {pickup_code}\n"
+        f"Amount: {total_price}\n"
+        f"Payment method: {pay_method}\n"
+    )
+    if order_time:
+        text_body += f"Please head to the store by: {order_time}\n"
+    text_body += "\nThank you for shopping with us."
+    return text_body
+
+
+async def _dead_letter(redis: ArqRedis, raw_messages: List[str], reason: str):
+    await redis.rpush(EMAIL_DEAD_LETTER_KEY, *raw_messages)
+    logger.error(f"Dead-lettered {len(raw_messages)} emails: {reason}")
+
+
+async def _retry_or_dead_letter(
+    ctx, redis: ArqRedis, raw_messages: List[str], error: Exception
+):
+    if ctx["job_try"] < settings.EMAIL_MAX_TRIES:
+        # Put the batch back in front of anything queued meanwhile
+        await redis.lpush(EMAIL_OUTBOX_KEY, *reversed(raw_messages))
+        raise Retry(defer=settings.EMAIL_RETRY_DELAY * ctx["job_try"])
+    await _dead_letter(redis, raw_messages, str(error))
+    raise error
+
+
+async def _schedule_outbox_flush(redis: ArqRedis):
+    # One flush job per batching window: confirmations arriving in the same
+    # window share a job id, so arq enqueues it once and they go out together
+    window = settings.EMAIL_BATCH_WINDOW
+    await redis.enqueue_job(
+        "flush_email_outbox",
+        _job_id=f"flush_email_outbox:{int(time.time() // window)}",
+        _defer_by=window,
+    )
+
+
+async def send_order_confirmation_email(
+    ctx, order_id: int, email: str, pickup_code: str, pay_method: str, amount: float
+):
+    crud_order: CRUDOrder = ctx["crud_order"]
+    redis: ArqRedis = ctx["redis"]
+
+    try:
+        order, vendor = crud_order.get_with_vendor(order_id)
+    except Exception as e:
+        if ctx["job_try"] < settings.EMAIL_MAX_TRIES:
+            raise Retry(defer=settings.EMAIL_RETRY_DELAY * ctx["job_try"])
+        await _dead_letter(
+            redis,
+            [json.dumps({"order_id": order_id, "To": email})],
+            f"could not compose confirmation for order {order_id}: {e}",
+        )
+        return
+
+    message = build_postmark_message(
+        to_email=email,
+        subject="Order confirmed",
+        text_body=compose_order_confirmation(
+            order, vendor, pickup_code, pay_method, amount
+        ),
+    )
+    if message is None:
+        return
+    await redis.rpush(EMAIL_OUTBOX_KEY, json.dumps(message))
+    await _schedule_outbox_flush(redis)
+
+
+async def flush_email_outbox(ctx):
+    redis: ArqRedis = ctx["redis"]
+
+    raw_messages = await redis.lpop(EMAIL_OUTBOX_KEY, POSTMARK_BATCH_LIMIT)
+    if not raw_messages:
+        return
+    messages = [json.loads(raw_message) for raw_message in raw_messages]
+
+    try:
+        results = await send_postmark_batch(messages)
+    except HTTPStatusError as e:
+        if e.response.status_code < 500 and e.response.status_code != 429:
+            # Postmark rejected the whole batch; retrying won't change that
+            await _dead_letter(redis, raw_messages, e.response.text)
+            return
+        await _retry_or_dead_letter(ctx, redis, raw_messages, e)
+    except Exception as e:
+        await _retry_or_dead_letter(ctx, redis, raw_messages, e)
+    else:
+        failed = [
+            raw_message
+            for raw_message, result in zip(raw_messages, results)
+            if result.get("ErrorCode")
+        ]
+        if failed:
+            await _dead_letter(redis, failed, "rejected by Postmark")
+        logger.info(f"Sent {len(raw_messages) - len(failed)} confirmation emails")
+
+    if await redis.llen(EMAIL_OUTBOX_KEY):
+        await _schedule_outbox_flush(redis)
+
@@ -0,0 +1,30 @@
+import logging
+
+from arq import Retry
+
+from core.paystack import get_paystack
+from services.cart_service import CartService
+
+
+logger = logging.getLogger(__name__)
+
+
+async def process_paystack_charge(ctx, transaction: dict):
+    cart_service = CartService(
+        crud_auth_user=ctx["crud_auth_user"],
+        crud_product=ctx["crud_product"],
+        crud_cart=ctx["crud_cart"],
+        queue_connection=ctx["redis"],
+        crud_customer=ctx["crud_customer"],
+        crud_order=ctx["crud_order"],
+        crud_payment=ctx["crud_payment_details"],
+        crud_order_item=ctx["crud_order_item"],
+        crud_vendor=ctx["crud_vendor"],
+        paystack=get_paystack(),
+        crud_payment_event=ctx["crud_payment_event"],
+        redis=ctx["redis"],
+    )
+    if not await cart_service.process_paystack_charge(transaction):
+        # A verify call or another delivery holds the reference; check back later
+        raise Retry(defer=ctx["job_try"] * 5)
+    logger.info(f"Recorded Paystack charge {transaction['reference']}")
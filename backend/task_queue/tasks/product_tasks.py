@@ -1,7 +1,12 @@
-from crud import CRUDProductImage
+import logging
+
+from crud import CRUDProduct, CRUDProductImage
 from schemas.product import ProductImageCreate
 
 
+logger = logging.getLogger(__name__)
+
+
 # TODO: REVIEW AND CHECK THIS LATER
 async def save_product_images(ctx, product_id: int, product_images: ProductImageCreate):
     crud_product_image: CRUDProductImage = ctx["crud_product_image"]
@@ -11,3 +16,9 @@ async def save_product_images(ctx, product_id: int, product_images: ProductImage
         )
         await crud_product_image.create(product_img_obj)
     return
+
+
+async def backfill_product_rating_aggregates(ctx):
+    crud_product: CRUDProduct = ctx["crud_product"]
+    updated = await crud_product.backfill_rating_aggregates()
+    logger.info(f"Recomputed rating aggregates for {updated} products")
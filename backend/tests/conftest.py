@@ -1,7 +1,15 @@
 from httpx import AsyncClient
 import pytest
+import pytest_asyncio
+from redis.asyncio import Redis
 
-from core.db import get_db
+from core import settings
+
+from core.db import get_async_db, get_db
+from core.middleware import install_query_instrumentation
+from core.principal_cache import principal_cache
+from core.redis import get_redis
+from core.response_cache import response_cache
 from core.tokens import (
     get_current_auth_user,
     get_current_verified_customer,
@@ -20,7 +28,12 @@ from tests.sample_datas.samples import (
     sample_get_verified_customer,
     sample_get_verified_vendor,
 )
-from tests.sample_datas.testdb import engine, mock_get_db
+from tests.sample_datas.testdb import (
+    async_engine,
+    engine,
+    mock_get_async_db,
+    mock_get_db,
+)
 from models import auth_user, order, product, cart as cartmodel, AuthUser
 from .mock_dependencies import (
     mock_crud_auth_user,
@@ -30,9 +43,23 @@ from .mock_dependencies import (
     mock_crud_otp,
 )
 
+install_query_instrumentation(engine)
+install_query_instrumentation(async_engine.sync_engine)
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    # Redis connections are tied to the loop that opened them, and every test
+    # runs on a fresh loop
+    redis = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    app.dependency_overrides[get_redis] = lambda: redis
+    yield redis
+    app.dependency_overrides.pop(get_redis, None)
+    await redis.aclose()
+
 
 @pytest.fixture
-def client():
+def client(redis_client):
     # Drop Tables
     auth_user.Base.metadata.drop_all(bind=engine)
     product.Base.metadata.drop_all(bind=engine)
@@ -43,6 +70,9 @@ def client():
     product.Base.metadata.create_all(bind=engine)
     cartmodel.Base.metadata.create_all(bind=engine)
     order.Base.metadata.create_all(bind=engine)
+    # user ids restart with every schema, so cached principals are stale
+    principal_cache.local_cache.clear()
+    response_cache.local_cache.clear()
     client = AsyncClient(app=app, base_url="https://127.0.0.1/")
     yield client
 
@@ -50,6 +80,7 @@ def client():
 @pytest.fixture
 def database_override_dependencies():
     app.dependency_overrides[get_db] = mock_get_db
+    app.dependency_overrides[get_async_db] = mock_get_async_db
     app.dependency_overrides[get_queue_connection] = lambda: mock_queue_connection
     app.dependency_overrides[get_crud_otp] = lambda: mock_crud_otp
     yield
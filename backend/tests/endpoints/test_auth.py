@@ -2,13 +2,14 @@ from typing import Dict, List, Union
 
 import pytest
 from fastapi import status
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from httpx import AsyncClient
+from redis.exceptions import ConnectionError as RedisConnectionError
 
 from core.errors import InvalidRequest
 from core.tokens import get_current_auth_user, verify_access_token
 from main import app
-from models.auth_user import OTP
+from models.auth_user import OTP, AuthUser
 from tests.conftest import database_override_dependencies, mock_crud_auth_user
 from tests.mock_dependencies import mock_crud_otp
 from schemas import OTPType, RegisterAuthUserResponse
@@ -21,6 +22,8 @@ from tests.sample_datas.auth_user_samples import (
     sample_login_user_wrong_email,
     sample_verify_auth_user,
 )
+from tests.sample_datas.testdb import TestingSessionLocal
+from utils.password_utils import pwd_context
 
 
 crud_otp_verify_path = "endpoints.auth.crud_otp.verify_otp"
@@ -168,15 +171,34 @@ async def test_verify_email_token_wrong_token(client, database_override_dependen
 
 
 @pytest.mark.asyncio
-async def test_login_success(client, database_override_dependencies):
+async def test_login_success(client, redis_client, database_override_dependencies):
     response = await login_user(client)
     assert response.json()["access_token"]
     assert response.json()["refresh_token"]
     access_token = response.json().get("access_token")
-    verify_access_token(token=access_token)
+    await verify_access_token(token=access_token, redis=redis_client)
     assert response.status_code == status.HTTP_201_CREATED
 
 
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password(client, database_override_dependencies):
+    await register_and_verify_email(client)
+    with TestingSessionLocal() as db:
+        auth_user = db.query(AuthUser).filter(AuthUser.id == 1).first()
+        auth_user.password = pwd_context.hash("2Strong", rounds=1000)
+        db.commit()
+
+    response = await client.post(
+        "/auth/login", data=sample_login_user_customer(), headers=sample_header()
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    with TestingSessionLocal() as db:
+        auth_user = db.query(AuthUser).filter(AuthUser.id == 1).first()
+        assert not pwd_context.needs_update(auth_user.password)
+        assert pwd_context.verify("2Strong", auth_user.password)
+
+
 @pytest.mark.asyncio
 async def test_login_nonexistent_user(client, database_override_dependencies):
     await register_user(client)
@@ -233,6 +255,55 @@ async def test_logout_user_invalid_token(
         assert rsp.status_code == status.HTTP_403_FORBIDDEN
 
 
+@pytest.mark.asyncio
+async def test_revocation_check_fails_open_when_redis_is_down(
+    client, redis_client, database_override_dependencies, monkeypatch
+):
+    login_rsp = await login_user(client)
+    headers = {"authorization": f"Bearer {login_rsp.json()['access_token']}"}
+    monkeypatch.setattr(
+        redis_client, "exists", AsyncMock(side_effect=RedisConnectionError)
+    )
+    monkeypatch.setattr(
+        redis_client, "set", AsyncMock(side_effect=RedisConnectionError)
+    )
+
+    me_rsp = await client.get("/auth/me", headers=headers)
+    logout_rsp = await client.post(
+        "/auth/logout",
+        json={"access_token": login_rsp.json()["access_token"]},
+        headers=headers,
+    )
+
+    assert me_rsp.status_code == status.HTTP_200_OK
+    assert logout_rsp.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_cached_principal_is_invalidated_across_processes(
+    client, redis_client, database_override_dependencies
+):
+    login_rsp = await login_user(client)
+    headers = {"authorization": f"Bearer {login_rsp.json()['access_token']}"}
+    with TestingSessionLocal() as db:
+        auth_user = db.query(AuthUser).filter(AuthUser.id == 1).first()
+        auth_user.role_id = 1
+        db.commit()
+    await client.get("/auth/me", headers=headers)
+
+    with TestingSessionLocal() as db:
+        auth_user = db.query(AuthUser).filter(AuthUser.id == 1).first()
+        auth_user.first_name = "Renamed"
+        db.commit()
+    cached_rsp = await client.get("/auth/me", headers=headers)
+    # what the worker's invalidate does, without touching this process's cache
+    await redis_client.incr("principal_version:1")
+    fresh_rsp = await client.get("/auth/me", headers=headers)
+
+    assert cached_rsp.json()["first_name"] != "Renamed"
+    assert fresh_rsp.json()["first_name"] == "Renamed"
+
+
 @pytest.mark.asyncio
 async def test_get_user_success(
     client, database_override_dependencies, get_current_auth_user_override_dependency
@@ -349,7 +420,7 @@ async def test_refresh_token_success(
 
     headers = sample_header()
     with patch(
-        "core.tokens.crud_refresh_token.check_if_refresh_token_exist"
+        "crud.auth.CRUDRefreshToken.check_if_refresh_token_exist"
     ) as mock_crud_refresh_token:
         mock_crud_refresh_token.return_value = True
         rsp = await client.post(
@@ -1,8 +1,13 @@
+import asyncio
 from typing import Dict, List, Union
 from httpx import AsyncClient
 import pytest
 from fastapi import status
 
+from core import settings
+from crud import CRUDCart, RedisCartStore
+from crud.cart_store import DIRTY_CARTS_KEY
+from models import Cart
 from tests.endpoints.test_auth import login_user
 from tests.endpoints.test_customer import create_test_customer
 from tests.endpoints.test_product import create_product
@@ -19,9 +24,12 @@ from tests.sample_datas.samples import (
     sample_add_to_cart_overquantity,
     sample_checkout_data,
     sample_customer_create,
+    sample_product_create,
+    sample_product_create_second,
     sample_vendor_create,
 )
 from tests.mock_dependencies import mock_queue_connection
+from tests.sample_datas.testdb import TestingSessionLocal
 
 
 async def create_multiple_users(
@@ -144,7 +152,31 @@ async def test_same_product_id_twice(
 
     await client.post("/cart/add", json=sample_add_to_cart())
     second_rsp = await client.post("/cart/add", json=sample_add_to_cart())
+    assert second_rsp.status_code == status.HTTP_201_CREATED
+    assert second_rsp.json()["quantity"] == 2 * sample_add_to_cart()["quantity"]
+    with TestingSessionLocal() as db:
+        assert db.query(Cart).count() == 1
+
+
+@pytest.mark.asyncio
+async def test_same_product_id_twice_over_stock(
+    client: AsyncClient,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    await create_test_customer(client, database_override_dependencies)
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+
+    await client.post("/cart/add", json={"product_id": 1, "quantity": 150})
+    second_rsp = await client.post("/cart/add", json={"product_id": 1, "quantity": 60})
+    summary_rsp = await client.get("/cart/summary")
+
     assert second_rsp.status_code == status.HTTP_403_FORBIDDEN
+    assert summary_rsp.json()["total_items_quantity"] == 150
 
 
 @pytest.mark.asyncio
@@ -252,6 +284,81 @@ async def test_get_cart_summary_success(
     assert rsp.status_code == status.HTTP_200_OK
 
 
+@pytest.mark.asyncio
+async def test_get_cart_summary_query_count_independent_of_basket_size(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+    monkeypatch,
+):
+    await create_test_customer(client, database_override_dependencies)
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+        sample_product_create_json=[
+            sample_product_create(),
+            sample_product_create_second(),
+        ],
+    )
+    monkeypatch.setattr(settings, "DEBUG", True)
+
+    await client.post("/cart/add", json=sample_add_to_cart())
+    one_item_rsp = await client.get("/cart/summary")
+    await client.post("/cart/add", json={"product_id": 2, "quantity": 1})
+    two_items_rsp = await client.get("/cart/summary")
+
+    assert two_items_rsp.json()["total_amount"] == 5 * 2000 + 200
+    assert two_items_rsp.json()["total_items_quantity"] == 6
+    assert len(two_items_rsp.json()["cart_items"]) == 2
+    assert (
+        one_item_rsp.headers["X-DB-Query-Count"]
+        == two_items_rsp.headers["X-DB-Query-Count"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_redis_cart_backend_writes_behind_to_database(
+    client,
+    redis_client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "CART_BACKEND", "redis")
+    await redis_client.delete("cart:1", DIRTY_CARTS_KEY)
+    add_rsp = await create_add_to_cart(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    second_add_rsp = await client.post("/cart/add", json=sample_add_to_cart())
+    summary_rsp = await client.get("/cart/summary")
+
+    assert add_rsp.status_code == status.HTTP_201_CREATED
+    assert second_add_rsp.json()["quantity"] == 10
+    assert summary_rsp.json()["total_items_quantity"] == 10
+    with TestingSessionLocal() as db:
+        assert db.query(Cart).count() == 0
+        assert await redis_client.sismember(DIRTY_CARTS_KEY, 1)
+        cart_store = RedisCartStore(redis_client, CRUDCart(db=db, model=Cart))
+        await cart_store.flush(1)
+        assert db.query(Cart).one().quantity == 10
+
+
+@pytest.mark.asyncio
+async def test_redis_cart_concurrent_adds_never_pass_stock(client, redis_client):
+    await redis_client.delete("cart:1", DIRTY_CARTS_KEY)
+    with TestingSessionLocal() as db:
+        cart_store = RedisCartStore(redis_client, CRUDCart(db=db, model=Cart))
+        results = await asyncio.gather(
+            *(cart_store.add_item(1, 1, 5, stock=12) for _ in range(5))
+        )
+
+        assert sorted(results, key=lambda r: r or 0) == [None, None, None, 5, 10]
+        assert await cart_store.get_quantity(1, 1) == 10
+
+
 @pytest.mark.asyncio
 async def test_get_cart_summary_no_cart_item(
     client,
@@ -0,0 +1,100 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import status
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from core.health import ReadinessProbe, readiness_probe
+from core.redis import get_redis
+from main import app
+
+
+@pytest.mark.asyncio
+async def test_metrics_exposes_request_and_queue_metrics(
+    client, database_override_dependencies
+):
+    mock_redis = MagicMock()
+    mock_redis.zcard = AsyncMock(return_value=3)
+    app.dependency_overrides[get_redis] = lambda: mock_redis
+    await client.get("/monitoring/health")
+    rsp = await client.get("/monitoring/metrics")
+
+    assert rsp.status_code == status.HTTP_200_OK
+    assert rsp.headers["content-type"].startswith("text/plain")
+    assert 'route="/monitoring/health"' in rsp.text
+    assert "arq_queue_depth 3.0" in rsp.text
+    assert "http_requests_in_flight" in rsp.text
+
+
+@pytest.mark.asyncio
+async def test_metrics_keeps_last_queue_depth_when_redis_is_down(
+    client, database_override_dependencies
+):
+    mock_redis = MagicMock()
+    mock_redis.zcard = AsyncMock(return_value=5)
+    app.dependency_overrides[get_redis] = lambda: mock_redis
+    await client.get("/monitoring/metrics")
+    mock_redis.zcard = AsyncMock(side_effect=RedisConnectionError)
+    rsp = await client.get("/monitoring/metrics")
+
+    assert rsp.status_code == status.HTTP_200_OK
+    assert "arq_queue_depth 5.0" in rsp.text
+    assert 'redis_errors_total{operation="queue_depth"}' in rsp.text
+
+
+@pytest.mark.asyncio
+async def test_liveness(client):
+    rsp = await client.get("/monitoring/live")
+
+    assert rsp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_readiness_success(client):
+    readiness_probe._result = None
+    mock_redis = MagicMock()
+    mock_redis.zcard = AsyncMock(return_value=0)
+    app.dependency_overrides[get_redis] = lambda: mock_redis
+    with patch("core.health._check_database", AsyncMock()), patch(
+        "core.health._check_redis", AsyncMock()
+    ):
+        rsp = await client.get("/monitoring/ready")
+
+    assert rsp.status_code == status.HTTP_200_OK
+    assert rsp.json() == {
+        "ready": True,
+        "checks": {"database": "ok", "redis": "ok"},
+        "queue_depth": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_readiness_fails_when_redis_is_down(client):
+    readiness_probe._result = None
+    with patch("core.health._check_database", AsyncMock()), patch(
+        "core.health._check_redis", AsyncMock(side_effect=ConnectionError)
+    ):
+        rsp = await client.get("/monitoring/ready")
+
+    assert rsp.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert rsp.json()["checks"]["redis"] == "failed: ConnectionError"
+    assert rsp.json()["checks"]["database"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_readiness_database_check_is_cancelled_on_timeout():
+    async def hang(*args):
+        await asyncio.sleep(60)
+
+    probe = ReadinessProbe(cache_ttl=0, timeout=0.05)
+    mock_redis = MagicMock()
+    mock_redis.ping = AsyncMock()
+    mock_redis.zcard = AsyncMock(return_value=0)
+    with patch("core.health.async_engine") as mock_engine:
+        conn = mock_engine.connect.return_value.__aenter__.return_value
+        conn.execute = AsyncMock(side_effect=hang)
+        result = await probe.check(mock_redis)
+
+    assert result["checks"]["database"] == "failed: TimeoutError"
+    assert conn.execute.await_count == 1
@@ -1,10 +1,22 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
 from httpx import AsyncClient
 import pytest
 from fastapi import status
+from sqlalchemy import text
 
+from core.paystack import get_paystack
+from crud import CRUDOrder
+from main import app
+from models import Order, OrderItem, PaymentDetails, Product
+from schemas import PaymentDetailsCreate
+from schemas.base import OrderStatusEnum, StatusEnum
+from task_queue.cron_jobs.order import expire_unpaid_orders
 from tests.endpoints.test_cart import create_add_to_cart
 from tests.sample_datas.samples import sample_checkout_data
 from tests.mock_dependencies import mock_queue_connection
+from tests.sample_datas.testdb import TestingSessionLocal
 
 
 @pytest.mark.asyncio
@@ -38,3 +50,135 @@ async def test_get_all_orders(
     rsp = await client.get("/order/")
     print(rsp.json())
     assert rsp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_expire_unpaid_orders_returns_stock(
+    client: AsyncClient,
+    redis_client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    await create_order(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    with TestingSessionLocal() as db:
+        db.execute(text("UPDATE orders SET order_date = now() - interval '1 day'"))
+        db.commit()
+        ctx = {"crud_order": CRUDOrder(db=db, model=Order), "redis": redis_client}
+        # the cash payment row was written with the order, so it's kept
+        await expire_unpaid_orders(ctx)
+        assert db.query(PaymentDetails).count() == 1
+        assert db.query(Order).count() == 1
+        stock_reserved = db.query(Product.stock).filter(Product.id == 1).scalar()
+
+        db.query(PaymentDetails).delete()
+        db.commit()
+        await expire_unpaid_orders(ctx)
+
+        # the order is kept, so a payment landing late can still find it
+        assert db.query(Order.status).scalar() == OrderStatusEnum.CANCELLED
+        assert (
+            db.query(Product.stock).filter(Product.id == 1).scalar()
+            > stock_reserved
+        )
+
+
+@pytest.mark.asyncio
+async def test_failed_payment_init_cancels_order(
+    client: AsyncClient,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    paystack = MagicMock()
+    paystack.initialize_payment = AsyncMock(return_value={"error": "timed out"})
+    app.dependency_overrides[get_paystack] = lambda: paystack
+    await create_add_to_cart(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    with TestingSessionLocal() as db:
+        stock_before = db.query(Product.stock).filter(Product.id == 1).scalar()
+
+    checkout = {**sample_checkout_data(), "payment_details": {"payment_method": "card"}}
+    rsp = await client.post("/cart/checkout", json=checkout)
+
+    assert rsp.json() == {"error": "timed out"}
+    with TestingSessionLocal() as db:
+        assert db.query(Order.status).scalar() == OrderStatusEnum.CANCELLED
+        assert db.query(Product.stock).filter(Product.id == 1).scalar() == stock_before
+
+
+async def expire_order(client, database_override_dependencies, dependency, db):
+    await create_order(client, database_override_dependencies, dependency)
+    db.query(PaymentDetails).delete()
+    db.execute(text("UPDATE orders SET order_date = now() - interval '1 day'"))
+    db.commit()
+    crud_order = CRUDOrder(db=db, model=Order)
+    await crud_order.cancel_expired_unpaid_orders(older_than=timedelta(minutes=30))
+    return crud_order, db.query(Order.id).scalar()
+
+
+def late_payment(order_id: int) -> PaymentDetailsCreate:
+    return PaymentDetailsCreate(
+        order_id=order_id,
+        payment_method="card",
+        amount=100,
+        payment_ref="ref_late",
+        status=StatusEnum.SUCCESS,
+        paid_at=datetime.utcnow(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_late_payment_reserves_stock_of_cancelled_order(
+    client: AsyncClient,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    with TestingSessionLocal() as db:
+        crud_order, order_id = await expire_order(
+            client,
+            database_override_dependencies,
+            get_current_verified_role_override_dependency,
+            db,
+        )
+        stock_released = db.query(Product.stock).filter(Product.id == 1).scalar()
+
+        statuses = await crud_order.record_payment(late_payment(order_id))
+
+        assert statuses == (OrderStatusEnum.CANCELLED, OrderStatusEnum.PROCESSING)
+        assert db.query(PaymentDetails).count() == 1
+        assert (
+            db.query(Product.stock).filter(Product.id == 1).scalar()
+            < stock_released
+        )
+
+
+@pytest.mark.asyncio
+async def test_late_payment_flags_refund_when_stock_is_gone(
+    client: AsyncClient,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    with TestingSessionLocal() as db:
+        crud_order, order_id = await expire_order(
+            client,
+            database_override_dependencies,
+            get_current_verified_role_override_dependency,
+            db,
+        )
+        db.query(Product).update({Product.stock: 0})
+        db.commit()
+
+        statuses = await crud_order.record_payment(late_payment(order_id))
+
+        assert statuses == (OrderStatusEnum.CANCELLED, OrderStatusEnum.REFUND_DUE)
+        assert db.query(PaymentDetails).count() == 1
+        assert db.query(Product.stock).filter(Product.id == 1).scalar() == 0
+        assert {status for (status,) in db.query(OrderItem.status)} == {
+            OrderStatusEnum.REFUNDED
+        }
@@ -0,0 +1,103 @@
+import hashlib
+import hmac
+import json
+
+import pytest
+from fastapi import status
+from sqlalchemy import text
+
+from core import settings
+from crud import CRUDPaymentEvent
+from models import PaymentEvent
+from tests.mock_dependencies import mock_queue_connection
+from tests.sample_datas.testdb import TestingSessionLocal
+
+
+def sign(body: bytes, secret: str) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+
+
+def sample_charge_success(reference: str = "ref_123") -> bytes:
+    return json.dumps(
+        {
+            "event": "charge.success",
+            "data": {
+                "reference": reference,
+                "status": "success",
+                "amount": 500000,
+                "channel": "card",
+                "paid_at": "2024-01-01T12:00:00.000Z",
+                "metadata": {"order_id": 1, "pickup_code": "ABC123"},
+                "customer": {"email": "customer@example.com"},
+            },
+        }
+    ).encode()
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_bad_signature(
+    client, database_override_dependencies, monkeypatch
+):
+    monkeypatch.setattr(settings.paystack_config, "SECRET_KEY", "sk_test")
+    mock_queue_connection.enqueue_job.reset_mock()
+    body = sample_charge_success()
+
+    rsp = await client.post(
+        "/payments/webhook",
+        content=body,
+        headers={"x-paystack-signature": sign(body, "sk_wrong")},
+    )
+
+    assert rsp.status_code == status.HTTP_403_FORBIDDEN
+    mock_queue_connection.enqueue_job.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_webhook_enqueues_charge(
+    client, database_override_dependencies, monkeypatch
+):
+    monkeypatch.setattr(settings.paystack_config, "SECRET_KEY", "sk_test")
+    mock_queue_connection.enqueue_job.reset_mock()
+    body = sample_charge_success()
+
+    rsp = await client.post(
+        "/payments/webhook",
+        content=body,
+        headers={"x-paystack-signature": sign(body, "sk_test")},
+    )
+
+    assert rsp.status_code == status.HTTP_200_OK
+    args, kwargs = mock_queue_connection.enqueue_job.call_args
+    assert args[0] == "process_paystack_charge"
+    assert args[1]["reference"] == "ref_123"
+    assert "_job_id" not in kwargs
+
+
+@pytest.mark.asyncio
+async def test_payment_reference_claimed_once(client):
+    with TestingSessionLocal() as db:
+        crud_payment_event = CRUDPaymentEvent(db=db, model=PaymentEvent)
+
+        assert crud_payment_event.claim("ref_123", source="verify")
+        assert not crud_payment_event.claim("ref_123", source="webhook")
+
+        crud_payment_event.release("ref_123")
+        assert crud_payment_event.claim("ref_123", source="webhook")
+
+        crud_payment_event.mark_processed("ref_123")
+        assert not crud_payment_event.claim("ref_123", source="verify")
+
+
+@pytest.mark.asyncio
+async def test_stale_payment_claim_is_taken_over(client):
+    with TestingSessionLocal() as db:
+        crud_payment_event = CRUDPaymentEvent(db=db, model=PaymentEvent)
+        assert crud_payment_event.claim("ref_123", source="verify")
+
+        db.execute(
+            text("UPDATE payment_events SET claimed_at = now() - interval '1 day'")
+        )
+        db.commit()
+
+        assert crud_payment_event.claim("ref_123", source="webhook")
+        assert not crud_payment_event.claim("ref_123", source="verify")
@@ -3,9 +3,15 @@ from httpx import AsyncClient
 import pytest
 from fastapi import status
 
-from schemas.product import ProductReturn
+from core import settings
+from core.response_cache import CATALOG_VERSION_KEY
+from core.errors import InvalidRequest
+from crud import CRUDProduct, CRUDProductReview
+from models import Product, ProductReview
+from schemas.product import ProductReturn, ProductReviewUpdate
 from tests.conftest import get_current_verified_role_override_dependency
 from tests.endpoints.test_vendor import create_vendor
+from tests.sample_datas.testdb import TestingSessionLocal
 from tests.sample_datas.samples import (
     sample_product_create,
     sample_product_create_second,
@@ -97,6 +103,46 @@ async def test_get_products_and_pagination_success(
     print(len(rsp.json()))
 
 
+@pytest.mark.asyncio
+async def test_get_products_cursor_pagination(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    products = [
+        sample_product_create(),
+        sample_product_create_second(),
+        sample_product_create_third(),
+    ]
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+        sample_product_create_json=products,
+    )
+    first_page = await client.get("/products?limit=2")
+    next_cursor = first_page.headers["X-Next-Cursor"]
+    second_page = await client.get(f"/products?limit=2&after={next_cursor}")
+
+    assert second_page.status_code == status.HTTP_200_OK
+    first_page_ids = {product["id"] for product in first_page.json()}
+    second_page_ids = {product["id"] for product in second_page.json()}
+    assert len(first_page_ids) == 2
+    assert len(second_page_ids) == 1
+    assert not first_page_ids & second_page_ids
+    assert "X-Next-Cursor" not in second_page.headers
+
+
+@pytest.mark.asyncio
+async def test_get_products_invalid_cursor(
+    client,
+    database_override_dependencies,
+):
+    rsp = await client.get("/products?after=not-a-cursor")
+
+    assert rsp.status_code == status.HTTP_403_FORBIDDEN
+
+
 @pytest.mark.asyncio
 async def test_get_products_search(
     client,
@@ -119,6 +165,54 @@ async def test_get_products_search(
     assert rsp.status_code == status.HTTP_200_OK
 
 
+@pytest.mark.asyncio
+async def test_get_products_search_by_category_name(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    products = [
+        sample_product_create(),
+        sample_product_create_second(),
+        sample_product_create_third(),
+    ]
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+        sample_product_create_json=products,
+    )
+    rsp = await client.get("/products?search=pet")
+
+    assert rsp.status_code == status.HTTP_200_OK
+    assert {product["category"]["category_name"] for product in rsp.json()} == {
+        "pets"
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_products_search_by_relevance(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    products = [
+        sample_product_create(),
+        sample_product_create_second(),
+        sample_product_create_third(),
+    ]
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+        sample_product_create_json=products,
+    )
+    rsp = await client.get("/products?search=iphone&sort=relevance")
+
+    assert rsp.status_code == status.HTTP_200_OK
+    assert "X-Next-Cursor" not in rsp.headers
+
+
 @pytest.mark.asyncio
 async def test_get_products_search_no_product(
     client,
@@ -320,6 +414,106 @@ async def test_create_product_review_success(
     assert rsp.status_code == status.HTTP_201_CREATED
 
 
+@pytest.mark.asyncio
+async def test_get_product_reviews_and_feed_aggregates(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    await client.post(
+        "/products/add-review",
+        json=sample_product_review_create(),
+    )
+    reviews_rsp = await client.get("/products/1/reviews")
+    feed_rsp = await client.get("/products")
+
+    assert reviews_rsp.status_code == status.HTTP_200_OK
+    assert len(reviews_rsp.json()) == 1
+    assert feed_rsp.json()[0]["review_count"] == 1
+    assert feed_rsp.json()[0]["avg_rating"] == sample_product_review_create()["rating"]
+    assert "reviews" not in feed_rsp.json()[0]
+
+
+@pytest.mark.asyncio
+async def test_update_review_from_stale_copy_keeps_aggregates_exact(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    await client.post("/products/add-review", json=sample_product_review_create())
+
+    with TestingSessionLocal() as db, TestingSessionLocal() as other_db:
+        stale_review = db.get(ProductReview, 1)
+        # another request changes the rating after stale_review was loaded
+        await CRUDProductReview(db=other_db, model=ProductReview).update_review(
+            other_db.get(ProductReview, 1), ProductReviewUpdate(rating=2)
+        )
+        await CRUDProductReview(db=db, model=ProductReview).update_review(
+            stale_review, ProductReviewUpdate(rating=5)
+        )
+        product = db.get(Product, 1, populate_existing=True)
+
+        assert product.rating_sum == 5
+        assert product.avg_rating == 5
+
+
+@pytest.mark.asyncio
+async def test_decrement_stock_names_unavailable_and_short_products(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    with TestingSessionLocal() as db:
+        crud_product = CRUDProduct(db=db, model=Product)
+        product = db.get(Product, 1)
+        stock = product.stock
+
+        with pytest.raises(InvalidRequest) as exc:
+            await crud_product.decrement_stock([(1, stock + 1)])
+        assert exc.value.detail == f"{product.product_name} has: {stock} stocks left"
+
+        product.product_status = False
+        db.commit()
+        with pytest.raises(InvalidRequest) as exc:
+            await crud_product.decrement_stock([(1, 1)])
+        assert exc.value.detail == f"{product.product_name} is no longer available"
+
+
+@pytest.mark.asyncio
+async def test_debug_mode_reports_query_count(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+    monkeypatch,
+):
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    monkeypatch.setattr(settings, "DEBUG", True)
+    rsp = await client.get("/products")
+
+    assert rsp.status_code == status.HTTP_200_OK
+    assert int(rsp.headers["X-DB-Query-Count"]) >= 1
+    assert float(rsp.headers["X-DB-Time-Ms"]) >= 0
+
+
 @pytest.mark.asyncio
 async def test_update_product_review_success(
     client,
@@ -404,3 +598,73 @@ async def test_create_product_review_invalid_rating(
     )
 
     assert rsp.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_product_feed_conditional_request(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    rsp = await client.get("/products")
+    etag = rsp.headers["ETag"]
+    not_modified_rsp = await client.get("/products", headers={"If-None-Match": etag})
+
+    assert rsp.status_code == status.HTTP_200_OK
+    assert rsp.headers["Cache-Control"].startswith("public")
+    assert not_modified_rsp.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified_rsp.headers["ETag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_product_update_invalidates_cached_product(
+    client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    before_rsp = await client.get("/products/1")
+    await client.put("/products/1", json=sample_product_update())
+    after_rsp = await client.get(
+        "/products/1", headers={"If-None-Match": before_rsp.headers["ETag"]}
+    )
+
+    assert after_rsp.status_code == status.HTTP_200_OK
+    assert after_rsp.json()["product_name"] == sample_product_update()["product_name"]
+
+
+@pytest.mark.asyncio
+async def test_catalog_version_bump_from_another_process_invalidates_cache(
+    client,
+    redis_client,
+    database_override_dependencies,
+    get_current_verified_role_override_dependency,
+):
+    await create_product(
+        client,
+        database_override_dependencies,
+        get_current_verified_role_override_dependency,
+    )
+    await client.get("/products/1")
+    with TestingSessionLocal() as db:
+        db.query(Product).filter(Product.id == 1).update({Product.stock: 0})
+        db.commit()
+    cached_rsp = await client.get("/products/1")
+    # what checkout or the worker does after changing stock elsewhere
+    await redis_client.incr(CATALOG_VERSION_KEY)
+    fresh_rsp = await client.get(
+        "/products/1", headers={"If-None-Match": cached_rsp.headers["ETag"]}
+    )
+
+    assert cached_rsp.json()["stock"] != 0
+    assert fresh_rsp.status_code == status.HTTP_200_OK
+    assert fresh_rsp.json()["stock"] == 0
@@ -1,11 +1,24 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from core import settings
 
 
 engine = create_engine(url=str(settings.TEST_SQLALCHEMY_DATABASE_URL))
 TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+async_engine = create_async_engine(
+    url=str(settings.TEST_SQLALCHEMY_DATABASE_URL).replace(
+        "postgresql://", "postgresql+asyncpg://", 1
+    ),
+    # every test runs on its own event loop, so connections can't be pooled
+    poolclass=NullPool,
+)
+AsyncTestingSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def mock_get_db():
     db = TestingSessionLocal()
@@ -13,3 +26,8 @@ def mock_get_db():
         yield db
     finally:
         db.close()
+
+
+async def mock_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
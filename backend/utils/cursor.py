@@ -0,0 +1,51 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from core.errors import InvalidRequest
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row on a page into an opaque, URL-safe token.
+    """
+    payload = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    )
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *value_types: type) -> Tuple:
+    """
+    Decode a token from encode_cursor back into a tuple of ``value_types``.
+    """
+    try:
+        padded_cursor = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(urlsafe_b64decode(padded_cursor))
+        if not isinstance(values, list) or len(values) != len(value_types):
+            raise ValueError
+        return tuple(
+            (
+                datetime.fromisoformat(value)
+                if value_type is datetime
+                else value_type(value)
+            )
+            for value, value_type in zip(values, value_types)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidRequest("Invalid cursor")
+
+
+def next_page_cursor(items: Sequence, limit: int, *fields: str) -> Optional[str]:
+    """
+    Cursor pointing after the last item, or None when this was the last page.
+    """
+    if not items or len(items) < limit:
+        return None
+    last_item = items[-1]
+    return encode_cursor(*(getattr(last_item, field) for field in fields))
@@ -1,18 +1,15 @@
-from typing import Optional
-
-from httpx import AsyncClient
+from typing import List, Optional
 
 from core import settings
+from core.http_clients import get_postmark_http_client
 
 
-async def send_postmark_email(
+def build_postmark_message(
     to_email: str, subject: str, text_body: str, html_body: Optional[str] = None
-):
-    """
-    Send an email through Postmark. No-op if server token or from email is missing.
-    """
+) -> Optional[dict]:
+    """Postmark message payload, or None if Postmark isn't configured."""
     if not settings.POSTMARK_SERVER_TOKEN or not settings.POSTMARK_FROM_EMAIL:
-        return
+        return None
 
     payload = {
         "From": settings.POSTMARK_FROM_EMAIL,
@@ -22,9 +19,28 @@ async def send_postmark_email(
     }
     if html_body:
         payload["HtmlBody"] = html_body
+    return payload
 
-    headers = {"X-Postmark-Server-Token": settings.POSTMARK_SERVER_TOKEN}
 
-    async with AsyncClient(base_url="https://api.postmarkapp.com") as client:
-        await client.post("/email", json=payload, headers=headers)
+async def send_postmark_email(
+    to_email: str, subject: str, text_body: str, html_body: Optional[str] = None
+):
+    """
+    Send an email through Postmark. No-op if server token or from email is missing.
+    """
+    payload = build_postmark_message(to_email, subject, text_body, html_body)
+    if payload is None:
+        return
+
+    await get_postmark_http_client().post("/email", json=payload)
 
+
+async def send_postmark_batch(messages: List[dict]) -> List[dict]:
+    """
+    Send up to 500 messages in one call to Postmark's batch endpoint.
+
+    Returns Postmark's per-message results, in the order of ``messages``.
+    """
+    rsp = await get_postmark_http_client().post("/email/batch", json=messages)
+    rsp.raise_for_status()
+    return rsp.json()